@@ -18,6 +18,7 @@ import json
 import base64
 
 import logging
+import operator
 
 from langfuse import Langfuse
 from datetime import datetime, timedelta
@@ -35,6 +36,8 @@ from langgraph.pregel import RetryPolicy
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
+    # Positions of AIMessages in `messages`, appended by the nodes that emit them
+    ai_msg_indices: Annotated[list, operator.add]
     
 # Add new node for external processing
 async def external_automation_node(state: State) -> State:
@@ -1,14 +1,20 @@
 from PyPDF2 import PdfReader
 
 from pathlib import Path
-import logging, base64
+import logging
+
+# pybase64 is a SIMD-accelerated drop-in for the stdlib encoder
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 
 def encode_image(image_path):
     """Encode image to base64 string"""
     with open(image_path, "rb") as image_file:
         return base64.b64encode(image_file.read()).decode("utf-8")
-    
+
 # Add this function to handle PDF processing
 def process_pdf(pdf_path: str) -> str:
     """Process PDF and return its content"""
@@ -1,6 +1,6 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
@@ -13,10 +13,13 @@ from langchain.prompts.chat import HumanMessagePromptTemplate
 from typing_extensions import TypedDict
 
 import requests 
-import json
+import orjson
 import base64
 
 import logging
+import hashlib
+import time
+from collections import OrderedDict
 
 from langfuse import Langfuse
 from datetime import datetime, timedelta
@@ -191,8 +194,52 @@ async def verify_place_of_birth(place_name: str) -> dict:
 
 
 
-# External function to call an API such as google search. it can be hard coded for the moment
+# TTL LRU cache for external service results, keyed by a hash of the input
+# messages so repeated reviews of the same document skip the external call
+EXTERNAL_SERVICE_CACHE_MAXSIZE = 1024
+EXTERNAL_SERVICE_CACHE_TTL = 3600  # seconds
+_external_service_cache = OrderedDict()
+
+
+def _external_service_cache_key(text) -> str:
+    """Build a stable cache key from the message contents"""
+    if isinstance(text, list):
+        contents = [item.content if hasattr(item, 'content') else str(item) for item in text]
+    else:
+        contents = str(text)
+    return hashlib.blake2b(orjson.dumps(contents), digest_size=16).hexdigest()
+
+
+def clear_external_service_cache():
+    """Drop all cached external service results (e.g. after a schema change)"""
+    _external_service_cache.clear()
+
+
 async def call_external_service(text: str) -> str:
+    """
+    External function to process text through a service, with results cached
+    """
+    key = _external_service_cache_key(text)
+    cached = _external_service_cache.get(key)
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < EXTERNAL_SERVICE_CACHE_TTL:
+        _external_service_cache.move_to_end(key)
+        print(f"External service cache hit for key {key}")
+        return cached[1]
+    
+    result = await _call_external_service(text)
+    
+    # Only cache successful lookups so transient failures are retried
+    if "error" not in result:
+        _external_service_cache[key] = (now, result)
+        _external_service_cache.move_to_end(key)
+        while len(_external_service_cache) > EXTERNAL_SERVICE_CACHE_MAXSIZE:
+            _external_service_cache.popitem(last=False)
+    return result
+
+
+# External function to call an API such as google search. it can be hard coded for the moment
+async def _call_external_service(text: str) -> str:
     """
     External function to process text through a service
     """
@@ -287,8 +334,9 @@ async def external_service_node(state: State) -> State:
     # Get the last message content
     # last_message = state["messages"][-1].content
     # last_message = state["messages"]
-    ai_messages = [msg for msg in state["messages"] if isinstance(msg, AIMessage)]
-    print(f"AI Messages to Make external call: {json.dumps([msg.content for msg in ai_messages], indent=2)}")
+    ai_messages = [state["messages"][i] for i in state.get("ai_msg_indices", [])]
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(f"AI Messages to Make external call: {orjson.dumps([msg.content for msg in ai_messages], option=orjson.OPT_INDENT_2).decode()}")
     
     
     # Call external service
@@ -296,7 +344,7 @@ async def external_service_node(state: State) -> State:
     
     # Create new message with processed result
     processed_message = HumanMessage(
-        content=f"External Processing Results: {json.dumps(result, indent=2)}"
+        content=f"External Processing Results: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}"
     )
     
     return {"messages": [processed_message]}
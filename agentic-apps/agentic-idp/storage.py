@@ -1,6 +1,6 @@
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
@@ -13,7 +13,7 @@ from langchain.prompts.chat import HumanMessagePromptTemplate
 from typing_extensions import TypedDict
 
 import requests 
-import json
+import orjson
 import base64
 
 import logging
@@ -58,20 +58,21 @@ async def external_storage_node(state: State) -> State:
     # Get the last message content
     # last_message = state["messages"]
     # translated = [state["messages"][0]] + [AIMessage(content=msg.content) for msg in state["messages"][1:]]
-    ai_messages = [msg for msg in state["messages"] if isinstance(msg, AIMessage)]
-    print(f"AI Messages to Store: {json.dumps([msg.content for msg in ai_messages], indent=2)}")
+    ai_messages = [state["messages"][i] for i in state.get("ai_msg_indices", [])]
+    ai_messages_json = orjson.dumps([msg.content for msg in ai_messages], option=orjson.OPT_INDENT_2).decode()
+    print(f"AI Messages to Store: {ai_messages_json}")
 
     
     # [-1].content
     print(f"Data to Store {ai_messages}")
-    print(json.dumps([msg.content for msg in ai_messages], indent=2))
+    print(ai_messages_json)
     
     # Call external service
-    result = await call_store_service(json.dumps([msg.content for msg in ai_messages], indent=2))
+    result = await call_store_service(ai_messages_json)
     
     # Create new message with processed result
     processed_message = HumanMessage(
-        content=f"External Processing Results: {json.dumps(result, indent=2)}"
+        content=f"External Processing Results: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}"
     )
     
     return {"messages": [processed_message]}
\ No newline at end of file
@@ -35,21 +35,31 @@ def check_tavily_api_key():
     print(f"✅ Tavily API key configured: {api_key[:8]}...")
     return True
 
-def check_server_health(max_retries=10, delay=2):
+def check_server_health(process=None, timeout=20, interval=0.25):
     """Check if the Tavily MCP server is running and healthy"""
-    for attempt in range(max_retries):
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        # Stop waiting as soon as the server process has exited
+        if process is not None and process.poll() is not None:
+            print(f"❌ Server process exited with code {process.returncode}")
+            return False
+        
         try:
             # Try to connect to the MCP server endpoint
-            response = requests.get("http://localhost:8001/", timeout=5)
+            response = requests.get("http://localhost:8001/", timeout=2)
             if response.status_code in [200, 404]:  # 404 is OK for MCP server root
                 print("✅ Tavily MCP server is healthy and ready!")
                 return True
         except requests.exceptions.RequestException:
             pass
         
-        if attempt < max_retries - 1:
-            print(f"⏳ Waiting for server to start... (attempt {attempt + 1}/{max_retries})")
-            time.sleep(delay)
+        if time.monotonic() >= deadline:
+            break
+        if attempt % 8 == 0:
+            print(f"⏳ Waiting for server to start... ({attempt * interval:.0f}s)")
+        time.sleep(interval)
     
     print("❌ Server health check failed after maximum retries")
     return False
@@ -77,11 +87,8 @@ def start_tavily_server():
         print(f"📡 Server started with PID: {process.pid}")
         print("🔗 MCP server available at: http://localhost:8001/mcp")
         
-        # Wait a moment for server to start
-        time.sleep(3)
-        
-        # Check if server is healthy
-        if check_server_health():
+        # Poll until the server answers instead of sleeping a fixed amount first
+        if check_server_health(process):
             print("\n🎉 Tavily MCP Server is ready!")
             print("\nAvailable tools:")
             print("  - web_search: General web search with AI-generated answers")
@@ -8,6 +8,7 @@ import os
 import json
 import logging
 import time
+from functools import lru_cache
 from opensearchpy import OpenSearch, RequestsHttpConnection
 from opensearchpy.exceptions import ConnectionError, ConnectionTimeout
 import boto3
@@ -163,8 +164,9 @@ def configure_opensearch_iam_access(domain_name, region, service_account_role_ar
         logger.warning(f"Failed to configure IAM-based access: {e}")
         return False
 
+@lru_cache(maxsize=1)
 def create_opensearch_client(endpoint, region, service_account_role_arn=None):
-    """Create OpenSearch client with AWS authentication"""
+    """Create OpenSearch client with AWS authentication (cached, so retries reuse the session and credentials)"""
     try:
         # Parse endpoint to get host
         host = endpoint.replace('https://', '').replace('http://', '')
@@ -217,6 +219,7 @@ def create_opensearch_client(endpoint, region, service_account_role_arn=None):
             use_ssl=True,
             verify_certs=True,
             connection_class=RequestsHttpConnection,
+            pool_maxsize=10,
             timeout=30,
             max_retries=3,
             retry_on_timeout=True
@@ -255,8 +258,7 @@ def create_opensearch_index(endpoint, region, index_name, dimension=384, service
                     "index": {
                         "number_of_shards": 1,
                         "number_of_replicas": 0,
-                        "knn": True,
-                        "knn.algo_param.ef_search": 100
+                        "knn": True
                     }
                 },
                 "mappings": {
@@ -270,11 +272,13 @@ def create_opensearch_index(endpoint, region, index_name, dimension=384, service
                             "dimension": dimension,
                             "method": {
                                 "name": "hnsw",
-                                "space_type": "cosinesimil",
-                                "engine": "nmslib",
+                                # Embeddings are L2-normalized, so inner product ranks like cosine
+                                "space_type": "innerproduct",
+                                "engine": "faiss",
                                 "parameters": {
-                                    "ef_construction": 128,
-                                    "m": 24
+                                    "ef_construction": 256,
+                                    "m": 16,
+                                    "ef_search": 64
                                 }
                             }
                         },
@@ -1,11 +1,30 @@
 """Multi-agent system using Strands SDK with built-in tracing."""
 
-from .supervisor_agent import supervisor_agent
-from .knowledge_agent import knowledge_agent
-from .mcp_agent import mcp_agent
+import importlib
+
+# Agents are loaded on first access so importing one agent module does not
+# pull in the SDK clients of the others
+_AGENT_MODULES = {
+    "supervisor_agent": "supervisor_agent",
+    "knowledge_agent": "knowledge_agent",
+    "mcp_agent": "mcp_agent",
+}
 
 __all__ = [
     "supervisor_agent",
-    "knowledge_agent", 
+    "knowledge_agent",
     "mcp_agent"
 ]
+
+
+def __getattr__(name):
+    if name in _AGENT_MODULES:
+        module = importlib.import_module(f".{_AGENT_MODULES[name]}", __name__)
+        agent = getattr(module, name)
+        globals()[name] = agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,16 +1,23 @@
 """Knowledge Agent using Strands SDK patterns."""
 
 import os
-import json
+import re
+import io
+import orjson
 import hashlib
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+import atexit
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
-import pandas as pd
 from strands import Agent, tool
 from strands_tools import file_read, file_write
 from ..tools.embedding_retriever import EmbeddingRetriever
+from ..tools.semantic_cache import semantic_cache
+from ..tools.ttl_cache import knowledge_status_cache
 from ..config import config
 from ..utils.logging import log_title
 from ..utils.model_providers import get_reasoning_model
@@ -21,6 +28,271 @@ logger = logging.getLogger(__name__)
 # Set up tracing environment
 setup_tracing_environment()
 
+# Number of documents sent per embedding request and bulk index call
+EMBED_BATCH = 64
+
+# File types picked up from the knowledge directory
+KNOWLEDGE_FILE_SUFFIXES = frozenset([".md", ".txt", ".json", ".csv"])
+
+
+# Sidecar in the knowledge directory recording the (size, mtime, content hash) of each embedded file
+EMBED_CACHE_FILE = ".embed_cache.json"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+@functools.lru_cache(maxsize=1)
+def _get_retriever() -> EmbeddingRetriever:
+    """Get the shared EmbeddingRetriever so tool calls reuse its HTTP session and OpenSearch client"""
+    retriever = EmbeddingRetriever()
+    atexit.register(retriever.close)
+    return retriever
+
+# Below this many files, stat() calls are cheaper to issue serially than through a thread pool
+PARALLEL_STAT_MIN = 64
+
+def _safe_stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def _stat_files(paths: List[str]) -> List[Optional[os.stat_result]]:
+    """Stat paths, issuing the calls concurrently for large listings (e.g. on NFS or a cold cache)."""
+    if len(paths) < PARALLEL_STAT_MIN:
+        return [_safe_stat(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=config.KB_INGEST_WORKERS) as executor:
+        return list(executor.map(_safe_stat, paths, chunksize=32))
+
+class _DirIndex:
+    """Cached listing of knowledge files, re-walked only when a directory mtime changes."""
+    
+    def __init__(self):
+        self._root: Optional[str] = None
+        self._dir_mtimes: Dict[str, float] = {}
+        # Sorted relative paths; their stats are not cached, since in-place edits leave
+        # directory mtimes untouched
+        self._paths: List[str] = []
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _walk(root: str):
+        dir_mtimes = {}
+        candidates = []
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                dir_mtimes[directory] = os.stat(directory).st_mtime
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif (entry.name != EMBED_CACHE_FILE
+                              and os.path.splitext(entry.name)[1] in KNOWLEDGE_FILE_SUFFIXES
+                              and entry.is_file()):
+                            candidates.append(entry.path)
+            except OSError as e:
+                logger.warning(f"Could not scan {directory}: {e}")
+        
+        return dir_mtimes, sorted(os.path.relpath(path, root) for path in candidates)
+    
+    def _is_stale(self, root: str) -> bool:
+        if root != self._root:
+            return True
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+    
+    def files(self, root: str) -> Dict[str, Tuple[int, float]]:
+        """Return {relative path: (size, mtime)} for the knowledge files under root.
+        
+        Adding, removing or renaming a file changes its directory mtime and triggers a
+        re-walk; the listed files are re-stat'ed on every call so in-place edits show up.
+        """
+        with self._lock:
+            if self._is_stale(root):
+                self._dir_mtimes, self._paths = self._walk(root)
+                self._root = root
+            paths = list(self._paths)
+        
+        stats = _stat_files([os.path.join(root, relative_path) for relative_path in paths])
+        return {
+            relative_path: (stat.st_size, stat.st_mtime)
+            for relative_path, stat in zip(paths, stats)
+            if stat is not None
+        }
+
+_dir_index = _DirIndex()
+
+# Last scan_knowledge_directory response, valid while every listed file keeps its size and mtime
+_scan_cache = {"files": None, "result": None}
+
+def _load_embed_cache(knowledge_dir: Path) -> Dict[str, list]:
+    """Load the {relative path: [size, mtime, content hash]} record of previously embedded files."""
+    try:
+        with open(knowledge_dir / EMBED_CACHE_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable embed cache: {e}")
+        return {}
+
+def _save_embed_cache(knowledge_dir: Path, cache: Dict[str, list]) -> None:
+    try:
+        with open(knowledge_dir / EMBED_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps(cache))
+    except OSError as e:
+        logger.warning(f"Could not write embed cache: {e}")
+
+def _content_hash(text: str) -> str:
+    """Hash content with whitespace and case normalised, so trivial edits keep the same hash."""
+    normalized = _WHITESPACE_RE.sub(" ", text).strip().lower()
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+def _csv_documents(df, source: str) -> List[Dict[str, Any]]:
+    """Build one document per usable CSV row, extracting whole columns instead of iterating rows."""
+    logger.info(f"CSV file has {len(df)} rows and {len(df.columns)} columns")
+    
+    # Check if the CSV has question and context columns
+    if 'question' in df.columns and 'context' in df.columns:
+        questions = df['question'].fillna("").astype(str)
+        contexts = df['context'].fillna("").astype(str)
+        usable = (questions != "") & (contexts != "")
+        skipped = int((~usable).sum())
+        if skipped:
+            logger.warning(f"{skipped} rows are missing question or context, skipping")
+        
+        documents = [
+            {
+                "content": f"Question: {question}\nContext: {context}",
+                "metadata": {
+                    'source': source,
+                    'row_index': int(index),
+                    'type': 'csv_row',
+                    'question': question[:100]  # First 100 chars
+                }
+            }
+            for index, question, context in zip(
+                df.index[usable], questions[usable].tolist(), contexts[usable].tolist()
+            )
+        ]
+    else:
+        # If not a Q&A format, just concatenate all columns
+        columns = list(df.columns)
+        question_position = columns.index('question') if 'question' in columns else None
+        documents = []
+        for index, values in zip(df.index, zip(*(df[col].tolist() for col in columns))):
+            metadata = {
+                'source': source,
+                'row_index': int(index),
+                'type': 'csv_row',
+            }
+            if question_position is not None:
+                metadata['question'] = str(values[question_position])[:100]
+            documents.append({
+                "content": "\n".join([f"{col}: {value}" for col, value in zip(columns, values)]),
+                "metadata": metadata
+            })
+    
+    logger.info(f"Prepared {len(documents)} out of {len(df)} rows from {source}")
+    return documents
+
+def _document_id(source: str, content: str) -> str:
+    """Deterministic document id, so identical content from the same source maps to one indexed vector."""
+    key = f"{config.EMBEDDING_MODEL}\0{source}\0{content}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+def _iter_text_windows(f, chunk_size: int, overlap: int):
+    """Yield overlapping windows of chunk_size characters while reading f incrementally."""
+    # Advance by at least one character and at most one window, so an overlap outside
+    # 0 <= overlap < chunk_size can neither stall the loop nor skip text
+    step = min(chunk_size, max(1, chunk_size - overlap))
+    overlap = chunk_size - step
+    buffer = ""
+    emitted = False
+    for block in iter(lambda: f.read(chunk_size), ""):
+        buffer += block
+        while len(buffer) >= chunk_size:
+            yield buffer[:chunk_size]
+            emitted = True
+            buffer = buffer[step:]
+    # The tail is only new text if it extends past the overlap already emitted
+    if buffer.strip() and (not emitted or len(buffer) > overlap):
+        yield buffer
+
+def _large_file_documents(file_path: Path, source: str):
+    """Split an oversized text file into overlapping windows without reading it into memory at once."""
+    hasher = hashlib.blake2b(digest_size=16)
+    documents = []
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        for chunk_index, window in enumerate(
+            _iter_text_windows(f, config.CHUNK_SIZE, config.CHUNK_OVERLAP)
+        ):
+            hasher.update(_WHITESPACE_RE.sub(" ", window).strip().lower().encode())
+            documents.append({
+                "content": window,
+                "metadata": {
+                    "source": source,
+                    "type": file_path.suffix[1:],
+                    "size": len(window),
+                    "chunk_index": chunk_index
+                }
+            })
+    logger.info(f"Split large file {source} into {len(documents)} chunks")
+    return hasher.hexdigest(), documents
+
+def _process_knowledge_file(file_path: Path, source: str, cached_digest: Optional[str]) -> Dict[str, Any]:
+    """
+    Read, hash and split one knowledge file into documents ready for embedding.
+    
+    Returns a dict with the content digest, the documents (empty when the digest
+    matches cached_digest), whether the file is a CSV, and any error raised.
+    """
+    result = {"source": source, "digest": None, "documents": [], "csv": False, "unchanged": False, "error": None}
+    try:
+        is_csv = file_path.suffix.lower() == ".csv"
+        if not is_csv and file_path.stat().st_size > config.MAX_FILE_BYTES:
+            result["digest"], documents = _large_file_documents(file_path, source)
+            if result["digest"] == cached_digest:
+                result["unchanged"] = True
+            else:
+                result["documents"] = documents
+            return result
+        
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        result["digest"] = _content_hash(text)
+        # Touched or trivially edited files keep their normalised hash and need no re-embed
+        if result["digest"] == cached_digest:
+            result["unchanged"] = True
+            return result
+        
+        # Special handling for CSV files
+        if is_csv:
+            logger.info(f"Processing CSV file: {file_path}")
+            # pandas is heavy to import, so only load it once a CSV file is ingested
+            import pandas as pd
+            result["csv"] = True
+            result["documents"] = _csv_documents(pd.read_csv(io.StringIO(text)), source)
+        else:
+            # Standard processing for non-CSV files
+            result["documents"] = [{
+                "content": text,
+                "metadata": {
+                    "source": source,
+                    "type": file_path.suffix[1:],
+                    "size": len(text)
+                }
+            }]
+    except Exception as e:
+        result["error"] = e
+    return result
+
 @tool
 def scan_knowledge_directory() -> str:
     """
@@ -32,155 +304,174 @@ def scan_knowledge_directory() -> str:
     try:
         knowledge_dir = Path(config.KNOWLEDGE_DIR)
         if not knowledge_dir.exists():
-            result = json.dumps({"error": "Knowledge directory does not exist"})
+            result = orjson.dumps({"error": "Knowledge directory does not exist"}).decode()
             return result
         
-        files_info = []
-        for file_path in knowledge_dir.rglob("*"):
-            if file_path.is_file() and file_path.suffix in [".md", ".txt", ".json", ".csv"]:
-                stat = file_path.stat()
-                files_info.append({
-                    "path": str(file_path.relative_to(knowledge_dir)),
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "type": file_path.suffix[1:]
-                })
-        
-        result = json.dumps({
+        files = _dir_index.files(str(knowledge_dir))
+        if _scan_cache["files"] == files:
+            logger.info("Knowledge directory unchanged, returning cached scan")
+            return _scan_cache["result"]
+        
+        files_info = [
+            {
+                "path": relative_path,
+                "size": size,
+                "modified": mtime,
+                "type": os.path.splitext(relative_path)[1][1:]
+            }
+            for relative_path, (size, mtime) in files.items()
+        ]
+        
+        result = orjson.dumps({
             "success": True,
             "files": files_info,
             "total_files": len(files_info)
-        })
+        }).decode()
+        _scan_cache["files"] = files
+        _scan_cache["result"] = orjson.dumps({
+            "success": True,
+            "files": files_info,
+            "total_files": len(files_info),
+            "cached": True
+        }).decode()
         
         logger.info(f"Scanned knowledge directory: {len(files_info)} files found")
         return result
         
     except Exception as e:
         logger.error(f"Error scanning knowledge directory: {e}")
-        return json.dumps({"error": str(e), "success": False})
+        return orjson.dumps({"error": str(e), "success": False}).decode()
         
         return error_result
 
 @tool
 @tool
-def embed_knowledge_files() -> str:
+def embed_knowledge_files(force_refresh: bool = False) -> str:
     """
     Process and embed all knowledge files.
     
+    Files whose size and modification time match the last successful embedding
+    are skipped unless force_refresh is set.
+    
+    Args:
+        force_refresh: Re-embed every file even if it has not changed
+    
     Returns:
         JSON string with embedding results
     """
     try:
         knowledge_dir = Path(config.KNOWLEDGE_DIR)
-        retriever = EmbeddingRetriever()
+        retriever = _get_retriever()
         
-        embedded_count = 0
-        total_files = 0
         total_rows = 0  # For CSV files
-        processed_files = []
-        
-        for file_path in knowledge_dir.rglob("*"):
-            if file_path.is_file() and file_path.suffix in [".md", ".txt", ".json", ".csv"]:
-                total_files += 1
-                try:
-                    # Special handling for CSV files
-                    if file_path.suffix.lower() == ".csv":
-                        logger.info(f"Processing CSV file: {file_path}")
-                        try:
-                            # Read the CSV file
-                            df = pd.read_csv(file_path)
-                            logger.info(f"CSV file has {len(df)} rows and {len(df.columns)} columns")
-                            
-                            # Process each row
-                            csv_success_count = 0
-                            for index, row in df.iterrows():
-                                try:
-                                    # Check if the CSV has question and context columns
-                                    if 'question' in df.columns and 'context' in df.columns:
-                                        question = row.get('question', '')
-                                        context = row.get('context', '')
-                                        
-                                        if not question or not context:
-                                            logger.warning(f"Row {index} is missing question or context, skipping")
-                                            continue
-                                        
-                                        # Create document content
-                                        document = f"Question: {question}\nContext: {context}"
-                                    else:
-                                        # If not a Q&A format, just concatenate all columns
-                                        document = "\n".join([f"{col}: {row[col]}" for col in df.columns])
-                                    
-                                    # Add metadata
-                                    metadata = {
-                                        'source': str(file_path.relative_to(knowledge_dir)),
-                                        'row_index': int(index),
-                                        'type': 'csv_row',
-                                    }
-                                    
-                                    # Add question as identifier if available
-                                    if 'question' in df.columns:
-                                        metadata['question'] = row['question'][:100]  # First 100 chars
-                                    
-                                    # Add to retriever
-                                    row_success = retriever.add_document(
-                                        content=document,
-                                        metadata=metadata
-                                    )
-                                    
-                                    if row_success:
-                                        csv_success_count += 1
-                                    
-                                    total_rows += 1
-                                    
-                                except Exception as e:
-                                    logger.error(f"Error processing CSV row {index}: {e}")
-                            
-                            logger.info(f"Successfully embedded {csv_success_count} out of {len(df)} rows from {file_path}")
-                            
-                            if csv_success_count > 0:
-                                embedded_count += 1
-                                processed_files.append(str(file_path.relative_to(knowledge_dir)))
-                                
-                        except Exception as e:
-                            logger.error(f"Error processing CSV file {file_path}: {e}")
-                    else:
-                        # Standard processing for non-CSV files
-                        # Read file content
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Add to retriever
-                        success = retriever.add_document(
-                            content=content,
-                            metadata={
-                                "source": str(file_path.relative_to(knowledge_dir)),
-                                "type": file_path.suffix[1:],
-                                "size": len(content)
-                            }
-                        )
-                        
-                        if success:
-                            embedded_count += 1
-                            processed_files.append(str(file_path.relative_to(knowledge_dir)))
-                    
-                except Exception as e:
-                    logger.error(f"Error processing file {file_path}: {e}")
-        
-        result = json.dumps({
+        # Documents are collected first and embedded in batches: (source, document)
+        pending_documents = []
+        
+        # An empty index means previously embedded files are gone too
+        embed_cache = {}
+        if not force_refresh and retriever.get_document_count() > 0:
+            embed_cache = _load_embed_cache(knowledge_dir)
+        
+        # Stats are fresh, so in-place edits are not mistaken for unchanged files
+        current_keys = {
+            relative_path: [size, mtime]
+            for relative_path, (size, mtime) in _dir_index.files(str(knowledge_dir)).items()
+        }
+        total_files = len(current_keys)
+        
+        # Start the new cache from the unchanged files; changed ones are added once embedded
+        new_cache = {
+            relative_path: embed_cache[relative_path] for relative_path, key in current_keys.items()
+            if embed_cache.get(relative_path, [])[:2] == key
+        }
+        skipped_count = len(new_cache)
+        candidate_paths = [
+            knowledge_dir / relative_path for relative_path in current_keys
+            if relative_path not in new_cache
+        ]
+        if skipped_count:
+            logger.info(f"Skipping {skipped_count} unchanged files")
+        expected_per_source = {}
+        content_hashes = {}
+        
+        # Reading, hashing and CSV parsing overlap across files; results keep directory order
+        sources = [str(file_path.relative_to(knowledge_dir)) for file_path in candidate_paths]
+        cached_digests = [
+            embed_cache[source][2] if len(embed_cache.get(source, [])) > 2 else None
+            for source in sources
+        ]
+        with ThreadPoolExecutor(max_workers=config.KB_INGEST_WORKERS) as executor:
+            processed_files = list(executor.map(_process_knowledge_file, candidate_paths, sources, cached_digests))
+        
+        for file_path, processed in zip(candidate_paths, processed_files):
+            source = processed["source"]
+            if processed["error"] is not None:
+                logger.error(f"Error processing file {file_path}: {processed['error']}")
+                continue
+            if processed["unchanged"]:
+                new_cache[source] = current_keys[source] + [processed["digest"]]
+                skipped_count += 1
+                continue
+            content_hashes[source] = processed["digest"]
+            expected_per_source[source] = len(processed["documents"])
+            if processed["csv"]:
+                total_rows += len(processed["documents"])
+            for document in processed["documents"]:
+                document["id"] = _document_id(source, document["content"])
+                pending_documents.append((source, document))
+        
+        # Embed and index the collected documents in batches
+        embedded_per_source = {}
+        reused_count = 0
+        for start in range(0, len(pending_documents), EMBED_BATCH):
+            batch = pending_documents[start:start + EMBED_BATCH]
+            batch_start = time.perf_counter()
+            # Rows or files already indexed with the same content and model need no embedding call
+            existing_ids = set() if force_refresh else retriever.existing_document_ids(
+                [document["id"] for _, document in batch]
+            )
+            new_documents = [document for _, document in batch if document["id"] not in existing_ids]
+            reused_count += len(batch) - len(new_documents)
+            if not new_documents or retriever.add_documents(new_documents):
+                for source, _ in batch:
+                    embedded_per_source[source] = embedded_per_source.get(source, 0) + 1
+            else:
+                logger.error(f"Failed to embed batch starting at document {start}")
+            logger.info(f"Embedded batch of {len(batch)} documents in {time.perf_counter() - batch_start:.2f}s")
+        
+        embedded_count = len(embedded_per_source)
+        if reused_count:
+            logger.info(f"Reused {reused_count} already indexed documents without re-embedding")
+        
+        # Only files whose documents were all indexed are recorded as embedded
+        for source, expected in expected_per_source.items():
+            if embedded_per_source.get(source, 0) == expected:
+                new_cache[source] = current_keys[source] + [content_hashes[source]]
+        _save_embed_cache(knowledge_dir, new_cache)
+        
+        result = orjson.dumps({
             "success": True,
             "embedded_count": embedded_count,
+            "skipped_unchanged": skipped_count,
+            "reused_documents": reused_count,
             "total_files": total_files,
             "total_csv_rows": total_rows,
             "message": f"Successfully embedded {embedded_count} out of {total_files} files" + 
-                      (f" ({total_rows} CSV rows)" if total_rows > 0 else "")
-        })
+                      (f" ({total_rows} CSV rows)" if total_rows > 0 else "") +
+                      (f", {skipped_count} unchanged files skipped" if skipped_count else "")
+        }).decode()
+        
+        # Cached search results and the document count may no longer reflect the index
+        if embedded_count:
+            semantic_cache.clear()
+            knowledge_status_cache.clear()
         
         logger.info(f"Embedding completed: {embedded_count}/{total_files} files processed")
         return result
         
     except Exception as e:
         logger.error(f"Error embedding knowledge files: {e}")
-        return json.dumps({"error": str(e), "success": False})
+        return orjson.dumps({"error": str(e), "success": False}).decode()
 
 # Create the knowledge agent with tracing
 knowledge_agent = create_traced_agent(
@@ -197,7 +488,7 @@ You are KnowledgeKeeper, a specialized agent for managing knowledge base operati
 
 **Available Tools:**
 - scan_knowledge_directory: Scan the knowledge directory and return file metadata
-- embed_knowledge_files: Process and embed all knowledge files
+- embed_knowledge_files: Process and embed all knowledge files (unchanged files are skipped; pass force_refresh=True to re-embed everything)
 - file_read: Read content from specific files
 - file_write: Write content to files
 
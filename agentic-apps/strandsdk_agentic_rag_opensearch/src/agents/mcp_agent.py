@@ -1,6 +1,8 @@
 """MCP Agent using Strands SDK patterns."""
 
 import logging
+import os
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from strands import Agent, tool
@@ -33,9 +35,6 @@ def file_write(content: str, path: str = None, filename: str = None) -> str:
     Returns:
         Result of the file write operation
     """
-    import os
-    from pathlib import Path
-    
     if path is None and filename is None:
         return "Error: Either path or filename must be provided"
     
@@ -76,9 +75,8 @@ def execute_with_mcp_tools(task_description: str, context: str = "") -> str:
     Returns:
         Result of the task execution
     """
-    # Create Langfuse span for MCP tool execution
-    mcp_span = langfuse_config.create_span(
-        trace=None,
+    # Create a Langfuse trace for MCP tool execution; it carries the sampling decision
+    mcp_span = langfuse_config.create_trace(
         name="mcp-tool-execution",
         input_data={
             "task_description": task_description,
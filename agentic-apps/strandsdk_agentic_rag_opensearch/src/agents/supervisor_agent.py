@@ -6,8 +6,14 @@ from ..utils.global_async_cleanup import setup_global_async_cleanup
 import asyncio
 import re
 import logging
-import json
+import orjson
+import queue
+import threading
 import uuid
+import atexit
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from strands import Agent, tool
@@ -43,6 +49,11 @@ except ImportError:
                 return 0.7  # Default reasonable relevance score
             return 0.3
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 try:
     from ragas.llms import LangchainLLMWrapper
 except ImportError:
@@ -56,6 +67,8 @@ from ..utils.model_providers import get_reasoning_model
 from ..utils.strands_langfuse_integration import create_traced_agent, setup_tracing_environment
 from ..utils.async_cleanup import suppress_async_warnings, setup_async_environment
 from ..tools.embedding_retriever import EmbeddingRetriever
+from ..tools.semantic_cache import semantic_cache
+from ..tools.ttl_cache import knowledge_status_cache
 from .mcp_agent import file_write  # Use the wrapped file_write from mcp_agent
 
 logger = logging.getLogger(__name__)
@@ -78,7 +91,6 @@ def get_evaluation_llm():
     global llm_for_evaluation
     if llm_for_evaluation is None:
         try:
-            from langchain_aws import ChatBedrockConverse
             llm_for_evaluation = ChatBedrockConverse(model=eval_modelId, additional_model_request_fields=thinking_params)
             llm_for_evaluation = LangchainLLMWrapper(llm_for_evaluation)
         except Exception as e:
@@ -94,23 +106,163 @@ def get_evaluation_llm():
 
 # Initialize Tavily MCP client
 tavily_mcp_client = None
+_tavily_mcp_client_lock = threading.Lock()
 
 def get_tavily_mcp_client():
     """Get or create Tavily MCP client with proper session management"""
     global tavily_mcp_client
     
     if tavily_mcp_client is None:
-        try:
-            # Use config for MCP service URL
-            mcp_url = config.TAVILY_MCP_SERVICE_URL
-            tavily_mcp_client = MCPClient(lambda: streamablehttp_client(mcp_url))
-            logger.info(f"Tavily MCP client initialized successfully with URL: {mcp_url}")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Tavily MCP client: {e}")
-            tavily_mcp_client = None
+        # Concurrent tool calls must not race to create separate clients
+        with _tavily_mcp_client_lock:
+            if tavily_mcp_client is None:
+                try:
+                    # Use config for MCP service URL
+                    mcp_url = config.TAVILY_MCP_SERVICE_URL
+                    tavily_mcp_client = MCPClient(lambda: streamablehttp_client(mcp_url))
+                    logger.info(f"Tavily MCP client initialized successfully with URL: {mcp_url}")
+                except Exception as e:
+                    logger.warning(f"Failed to initialize Tavily MCP client: {e}")
+                    tavily_mcp_client = None
     
     return tavily_mcp_client
 
+# The shared client's session is opened once and kept for the process lifetime, so queries
+# do not reconnect and concurrent requests never enter the same client twice. It is only
+# reopened once its background thread has actually died, never because one call failed
+_tavily_session_open = False
+_tavily_session_lock = threading.Lock()
+
+def _tavily_session_alive(mcp_client) -> bool:
+    """Check whether the client's background session thread is still running"""
+    is_active = getattr(mcp_client, "_is_session_active", None)
+    if callable(is_active):
+        return is_active()
+    thread = getattr(mcp_client, "_background_thread", None)
+    return thread is None or thread.is_alive()
+
+def ensure_tavily_mcp_session():
+    """Return the Tavily MCP client with its shared session open, or None if unavailable"""
+    global _tavily_session_open
+    
+    mcp_client = get_tavily_mcp_client()
+    if mcp_client is None or (_tavily_session_open and _tavily_session_alive(mcp_client)):
+        return mcp_client
+    
+    with _tavily_session_lock:
+        if _tavily_session_open and not _tavily_session_alive(mcp_client):
+            # The transport is gone; release the dead session before starting a new one
+            logger.warning("Tavily MCP session died, reconnecting")
+            _tavily_session_open = False
+            try:
+                mcp_client.__exit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"Error cleaning up dead Tavily MCP session: {e}")
+        if not _tavily_session_open:
+            try:
+                mcp_client.__enter__()
+                _tavily_session_open = True
+                logger.info("Tavily MCP session opened")
+            except Exception as e:
+                logger.warning(f"Failed to open Tavily MCP session: {e}")
+                return None
+    
+    return mcp_client
+
+def close_tavily_mcp_session() -> None:
+    """Close the shared Tavily MCP session if it is open"""
+    global _tavily_session_open
+    
+    with _tavily_session_lock:
+        if _tavily_session_open:
+            _tavily_session_open = False
+            try:
+                tavily_mcp_client.__exit__(None, None, None)
+                logger.info("Tavily MCP session closed")
+            except Exception as e:
+                logger.warning(f"Error closing Tavily MCP session: {e}")
+
+atexit.register(close_tavily_mcp_session)
+
+# MCP tool descriptors by name; the schemas are static per server and the tool objects
+# call through the shared client, so they stay valid across client sessions
+_tavily_tools_cache: Optional[Dict[str, Any]] = None
+_tavily_tools_lock = threading.Lock()
+
+def get_tavily_tools(mcp_client) -> Dict[str, Any]:
+    """List the Tavily MCP tools once per process; the client's session must be open"""
+    global _tavily_tools_cache
+    
+    if _tavily_tools_cache is None:
+        with _tavily_tools_lock:
+            if _tavily_tools_cache is None:
+                tools = mcp_client.list_tools_sync()
+                _tavily_tools_cache = {tool.tool_name: tool for tool in tools}
+                logger.info(f"Loaded {len(_tavily_tools_cache)} MCP tools from Tavily server")
+    
+    return _tavily_tools_cache
+
+def invalidate_tavily_tools() -> None:
+    """Drop the cached tool list so the next use lists it again; the shared session stays open
+    for concurrent requests and ensure_tavily_mcp_session reconnects it if it has died"""
+    global _tavily_tools_cache
+    
+    with _tavily_tools_lock:
+        _tavily_tools_cache = None
+
+@functools.lru_cache(maxsize=1)
+def _get_retriever() -> EmbeddingRetriever:
+    """Get the shared EmbeddingRetriever so tool calls reuse its HTTP session and OpenSearch client"""
+    retriever = EmbeddingRetriever()
+    atexit.register(retriever.close)
+    return retriever
+
+# Knowledge base relevance below which the web results are used instead
+WEB_SEARCH_RELEVANCE_THRESHOLD = 0.3
+
+# Keyword matchers for the weather-query validation, compiled once (substring, case-insensitive)
+_WEATHER_QUERY_RE = re.compile("weather|temperature|forecast")
+_WEATHER_CONTENT_RE = re.compile(
+    "weather|temperature|rain|sunny|cloudy|forecast|celsius|fahrenheit", re.IGNORECASE
+)
+
+# Keyword tokens for the relevance overlap check, taken from a bounded content prefix
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+RELEVANCE_SCAN_CHARS = 500
+
+# Token budget per search result returned to the reasoning model (~200 characters of English)
+SEARCH_RESULT_MAX_TOKENS = 48
+
+# Default relevance vs. diversity trade-off for MMR re-ranking of search results
+DEFAULT_MMR_LAMBDA = 0.7
+
+@functools.lru_cache(maxsize=1)
+def _get_token_encoder():
+    """Get the tiktoken encoding for the reasoning model, or None to fall back to character truncation"""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(config.REASONING_MODEL)
+        except KeyError:
+            # Non-OpenAI models (e.g. Qwen served through LiteLLM) have no registered encoding
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer, truncating search results by characters: {e}")
+        return None
+
+def _truncate_to_tokens(text: str, max_tokens: int = SEARCH_RESULT_MAX_TOKENS) -> str:
+    """Truncate text to a token budget so search results have a predictable prompt cost"""
+    encoder = _get_token_encoder()
+    if encoder is None:
+        max_chars = max_tokens * 4
+        return text[:max_chars] + "..." if len(text) > max_chars else text
+    
+    token_ids = encoder.encode(text)
+    if len(token_ids) <= max_tokens:
+        return text
+    return encoder.decode(token_ids[:max_tokens]) + "..."
+
 def calculate_relevance_score(results: List[Dict], query: str) -> float:
     """
     Calculate relevance score with content validation to prevent false positives.
@@ -125,56 +277,36 @@ def calculate_relevance_score(results: List[Dict], query: str) -> float:
     if not results:
         return 0.0
     
-    # Extract scores and validate content relevance
+    # Extract scores and keyword overlap ratios; the penalties and mean are vectorised below
     scores = []
+    overlap_ratios = []
     query_lower = query.lower()
-    query_keywords = set(query_lower.split())
+    query_keywords = frozenset(_TOKEN_RE.findall(query_lower))
+    is_weather_query = _WEATHER_QUERY_RE.search(query_lower) is not None
+    has_weather_content = False
     
+    # Results come normalised from the vector store, so every result has a float score
     for result in results:
-        # Get the similarity score
-        score = None
-        if isinstance(result, dict):
-            score = result.get('score') or result.get('_score')
-            if score is None and 'metadata' in result:
-                score = result['metadata'].get('score')
-        
-        if score is not None:
-            # Validate content relevance by checking keyword overlap
-            content = result.get('content', '').lower()
-            content_keywords = set(content.split())
-            
-            # Calculate keyword overlap ratio
-            overlap = len(query_keywords.intersection(content_keywords))
-            overlap_ratio = overlap / len(query_keywords) if query_keywords else 0
-            
-            # Penalize results with very low keyword overlap
-            if overlap_ratio < 0.1:  # Less than 10% keyword overlap
-                score = score * 0.2  # Heavily penalize
-            elif overlap_ratio < 0.3:  # Less than 30% keyword overlap
-                score = score * 0.5  # Moderately penalize
-            
-            scores.append(float(score))
+        # Validate content relevance by checking keyword overlap on a lowercased prefix
+        content_lower = result['content'][:RELEVANCE_SCAN_CHARS].lower()
+        content_keywords = frozenset(_TOKEN_RE.findall(content_lower))
+        overlap = len(query_keywords & content_keywords)
+        overlap_ratios.append(overlap / len(query_keywords) if query_keywords else 0)
+        scores.append(result['score'])
+        if is_weather_query and not has_weather_content:
+            has_weather_content = _WEATHER_CONTENT_RE.search(content_lower) is not None
     
-    if not scores:
-        return 0.0
+    # Penalize results with very low (< 10%: x0.2) or low (< 30%: x0.5) keyword overlap
+    overlap_ratios = np.asarray(overlap_ratios)
+    penalties = np.where(overlap_ratios < 0.1, 0.2, np.where(overlap_ratios < 0.3, 0.5, 1.0))
     
     # Calculate average and apply additional validation
-    avg_score = sum(scores) / len(scores)
+    avg_score = float(np.mean(np.asarray(scores) * penalties))
     
-    # Additional semantic validation for common mismatches
-    if any(keyword in query_lower for keyword in ['weather', 'temperature', 'forecast']):
-        # For weather queries, check if results contain weather-related terms
-        weather_terms = ['weather', 'temperature', 'rain', 'sunny', 'cloudy', 'forecast', 'celsius', 'fahrenheit']
-        has_weather_content = False
-        
-        for result in results:
-            content = result.get('content', '').lower()
-            if any(term in content for term in weather_terms):
-                has_weather_content = True
-                break
-        
-        if not has_weather_content:
-            avg_score = avg_score * 0.1  # Heavily penalize non-weather content for weather queries
+    # Additional semantic validation for common mismatches: weather queries need results
+    # containing weather-related terms (checked in the loop above)
+    if is_weather_query and not has_weather_content:
+        avg_score = avg_score * 0.1  # Heavily penalize non-weather content for weather queries
     
     return min(avg_score, 1.0)
 
@@ -190,10 +322,6 @@ def _run_async_evaluation_safe(scorer, sample):
     Returns:
         float: Evaluation score
     """
-    import asyncio
-    import threading
-    import queue
-    
     def run_evaluation():
         """Run the evaluation in a clean async environment."""
         async def evaluate():
@@ -344,7 +472,6 @@ Context: {context_for_answer}
 Answer:"""
                 
                 # Use a simple model call to generate the answer
-                from langchain_aws import ChatBedrockConverse
                 answer_llm = ChatBedrockConverse(model='us.anthropic.claude-3-7-sonnet-20250219-v1:0')
                 answer_response = answer_llm.invoke(answer_prompt)
                 generated_answer = answer_response.content.strip()
@@ -407,14 +534,114 @@ Answer:"""
                     "chunk_relevance_value": None
                 }
 
+def _build_search_response(query: str, results: List[Dict], top_k: int) -> Dict[str, Any]:
+    """Deduplicate and format search results with relevance metadata for one query"""
+    # Single pass: skip duplicates, format each unique result, and stop once top_k are kept.
+    # Content is already capped at 500 chars by the retriever, so the whole string is the
+    # dedup key - its hash is cached on the object and equal prefixes never collide
+    seen_content = set()
+    top_results = []
+    evaluation_parts = []
+    formatted_results = []
+    duplicates_removed = 0
+    for result in results:
+        content = result['content']
+        if content in seen_content:
+            duplicates_removed += 1
+            continue
+        seen_content.add(content)
+        top_results.append(result)
+        # RAGAs evaluation text (Score: and Content: patterns) and the compact JSON result,
+        # with content limited to a token budget
+        evaluation_parts.append(f"Score: {result['score']}\nContent: {content}\n\n")
+        formatted_results.append({
+            "source": result['source'],
+            "content": _truncate_to_tokens(content),
+            "score": result['score']
+        })
+        if len(top_results) == top_k:
+            break
+    
+    # Calculate relevance score with content validation over the results actually returned
+    relevance_score = calculate_relevance_score(top_results, query)
+    formatted_for_evaluation = "".join(evaluation_parts)
+    
+    # Create response with relevance metadata and validation info
+    response_data = {
+        "results": formatted_results,
+        "relevance_score": relevance_score,
+        "total_results": len(top_results),
+        "duplicates_removed": duplicates_removed,
+        "query": query,
+        "validation_note": "Relevance score includes content validation to prevent false positives",
+        "formatted_for_evaluation": formatted_for_evaluation  # Add this for RAGAs evaluation
+    }
+    if not top_results:
+        # Nothing cleared the score threshold, so relevance checking can be skipped
+        response_data["needs_web_search"] = True
+    
+    # Log successful search with debug info
+    logger.info(f"Knowledge base search completed: {len(top_results)} unique results (removed {duplicates_removed} duplicates), relevance: {relevance_score:.2f}")
+    
+    # Debug logging for relevance issues
+    if relevance_score < WEB_SEARCH_RELEVANCE_THRESHOLD:
+        logger.debug(f"Low relevance detected for query '{query}': {relevance_score:.2f}")
+        for i, result in enumerate(formatted_results[:2]):  # Log first 2 results for debugging
+            logger.debug(f"Result {i+1}: {result['content'][:50]}... (score: {result['score']:.2f})")
+    
+    return response_data
+
+def _search_knowledge_base_data(
+    query: str,
+    top_k: int = 3,
+    mmr_lambda: float = DEFAULT_MMR_LAMBDA,
+    no_cache: bool = False
+) -> Dict[str, Any]:
+    """Run one knowledge base search and return the response dict (raises on retrieval errors)"""
+    retriever = _get_retriever()
+    
+    # Reuse results of a recent identical or semantically similar query when available;
+    # the cache only holds results ranked with the default trade-off
+    use_cache = mmr_lambda == DEFAULT_MMR_LAMBDA and not no_cache
+    results = semantic_cache.get_by_text(query, top_k) if use_cache else None
+    if results is not None:
+        logger.info(f"Search cache hit for repeated query: {query[:50]}...")
+    else:
+        query_embedding, embedded = retriever.embed_with_status(query)
+        # A random fallback embedding must neither match nor populate cached results,
+        # or get_by_text would replay irrelevant hits after the embedding service recovers
+        use_cache = use_cache and embedded
+        results = semantic_cache.get(query_embedding, top_k) if use_cache else None
+        if results is None:
+            min_score = config.KB_MIN_SCORE or None
+            if mmr_lambda < 1:
+                results = retriever.search_by_vector_mmr(
+                    query_embedding, top_k=top_k, mmr_lambda=mmr_lambda, min_score=min_score
+                )
+            else:
+                results = retriever.search_by_vector(query_embedding, top_k=top_k, min_score=min_score)
+            if results and use_cache:
+                semantic_cache.put(query_embedding, top_k, results, query=query)
+        else:
+            logger.info(f"Semantic cache hit for query: {query[:50]}...")
+    
+    return _build_search_response(query, results, top_k)
+
 @tool
-def search_knowledge_base(query: str, top_k: int = 3) -> str:  
+def search_knowledge_base(
+    query: str,
+    top_k: int = 3,
+    mmr_lambda: float = DEFAULT_MMR_LAMBDA,
+    no_cache: bool = False
+) -> str:
     """
     Search the knowledge base for relevant information.
     
     Args:
         query (str): The search query - REQUIRED
         top_k (int): Number of top results to return (default: 3)
+        mmr_lambda (float): Relevance vs. diversity trade-off for re-ranking; 1.0 disables it (default: 0.7)
+        no_cache (bool): Bypass the search result cache, e.g. for sensitive or freshness-critical queries (default: False)
         
     Returns:
         str: JSON string with search results and relevance metadata
@@ -423,75 +650,182 @@ def search_knowledge_base(query: str, top_k: int = 3) -> str:
         return '{"error": "Query parameter is required and must be a non-empty string", "results": [], "relevance_score": 0.0}'
     
     try:
-        retriever = EmbeddingRetriever()
-        results = retriever.search(query, top_k=top_k)
+        response_data = _search_knowledge_base_data(query, top_k, mmr_lambda, no_cache)
         
-        # Calculate relevance score with content validation
-        relevance_score = calculate_relevance_score(results, query)
+        # Convert to JSON string
+        response = orjson.dumps(response_data).decode()
         
-        # Remove duplicate results
-        seen_content = set()
-        unique_results = []
-        for result in results:
-            content_hash = hash(result['content'][:100])  # Use first 100 chars as hash
-            if content_hash not in seen_content:
-                seen_content.add(content_hash)
-                unique_results.append(result)
+        return f"<search_results>\n{response}\n</search_results>"
         
-        # Format results for RAGAs evaluation (with Score: and Content: patterns)
-        formatted_for_evaluation = ""
-        for result in unique_results[:top_k]:
-            formatted_for_evaluation += f"Score: {result.get('score', result.get('_score', 0.0))}\n"
-            formatted_for_evaluation += f"Content: {result['content']}\n\n"
+    except Exception as e:
+        logger.error(f"Error searching knowledge base: {e}")
+        error_response = {
+            "error": f"Error searching knowledge base: {str(e)}",
+            "results": [],
+            "relevance_score": 0.0,
+            "query": query
+        }
+        return orjson.dumps(error_response).decode()
+
+def _mcp_web_search(query: str, max_results: int) -> Dict[str, Any]:
+    """Call the Tavily MCP web_search tool over the shared session"""
+    mcp_client = ensure_tavily_mcp_session()
+    if mcp_client is None:
+        return {"error": "Tavily MCP client unavailable", "query": query, "results": []}
+    try:
+        if "web_search" not in get_tavily_tools(mcp_client):
+            return {"error": "Tavily MCP server has no web_search tool", "query": query, "results": []}
+        result = mcp_client.call_tool_sync(
+            f"smart-search-{uuid.uuid4().hex[:8]}",
+            "web_search",
+            {"query": query, "max_results": max_results}
+        )
+    except Exception as e:
+        # Tool failures come back as error results, so an exception points at the connection;
+        # a dead session is detected and reopened by the next ensure_tavily_mcp_session call
+        logger.warning(f"Web search for smart_search failed: {e}")
+        invalidate_tavily_tools()
+        return {"error": f"Web search failed: {str(e)}", "query": query, "results": []}
+    
+    text = "".join(item.get("text", "") for item in result.get("content", []))
+    if result.get("status") == "error" or not text:
+        return {"error": f"Web search failed: {text or 'empty response'}", "query": query, "results": []}
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return {"error": "Web search returned invalid JSON", "query": query, "results": []}
+
+# A cancelled web search keeps running in its thread, so searches use a dedicated pool
+# rather than the loop's default executor, which asyncio.run would wait on at shutdown
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="smart-search")
+atexit.register(_search_pool.shutdown, wait=False)
+
+async def search_both_async(query: str, top_k: int = 3, max_results: int = 5) -> Dict[str, Any]:
+    """Search the knowledge base, overlapping the web search when it is slow; keep the web result only when KB relevance is low"""
+    loop = asyncio.get_running_loop()
+    kb_task = loop.run_in_executor(_search_pool, _search_knowledge_base_data, query, top_k)
+    
+    # Once submitted, the web call cannot be stopped, so it only starts if the knowledge
+    # base has not answered within the head start
+    web_task = None
+    done, _ = await asyncio.wait({kb_task}, timeout=config.SMART_SEARCH_WEB_DELAY)
+    if not done:
+        web_task = loop.run_in_executor(_search_pool, _mcp_web_search, query, max_results)
+    
+    try:
+        kb_data = await kb_task
+    except Exception as e:
+        logger.error(f"Error searching knowledge base in smart_search: {e}")
+        kb_data = {"error": f"Error searching knowledge base: {str(e)}", "results": [], "relevance_score": 0.0, "query": query}
+    
+    if kb_data["relevance_score"] >= WEB_SEARCH_RELEVANCE_THRESHOLD and not kb_data.get("needs_web_search"):
+        if web_task is not None:
+            # Only takes effect while the call is still queued in the pool
+            web_task.cancel()
+        return {"source": "knowledge_base", "knowledge_base": kb_data}
+    
+    if web_task is None:
+        web_task = loop.run_in_executor(_search_pool, _mcp_web_search, query, max_results)
+    return {"source": "web", "knowledge_base": kb_data, "web": await web_task}
+
+@tool
+def smart_search(query: str, top_k: int = 3, max_results: int = 5) -> str:
+    """
+    Search the knowledge base and, if needed, the web in one call.
+    Web results are only included when knowledge base relevance is low. The web search
+    also starts when the knowledge base takes longer than SMART_SEARCH_WEB_DELAY seconds,
+    and that Tavily call is spent even if the knowledge base results turn out relevant.
+    
+    Args:
+        query (str): The search query - REQUIRED
+        top_k (int): Number of knowledge base results to return (default: 3)
+        max_results (int): Maximum number of web results (default: 5)
         
-        # Format results as compact JSON for response
-        formatted_results = []
-        for result in unique_results[:top_k]:  # Ensure we don't exceed top_k after deduplication
-            # Limit content length to reduce tokens
-            content = result['content']
-            if len(content) > 200:  
-                content = content[:200] + "..."
-                
-            formatted_results.append({
-                "source": result['metadata'].get('source', 'Unknown'),
-                "content": content,
-                "score": result.get('score', result.get('_score', 0.0))
-            })
+    Returns:
+        str: JSON string with "source" ("knowledge_base" or "web"), the knowledge base results and, if used, the web results
+    """
+    if not query or not isinstance(query, str):
+        return '{"error": "Query parameter is required and must be a non-empty string", "source": "none"}'
+    
+    # Sync tools run off the agent's event loop thread, so a private loop is safe here
+    response_data = asyncio.run(search_both_async(query, top_k, max_results))
+    logger.info(f"Smart search completed for query '{query[:50]}...' using {response_data['source']}")
+    return f"<search_results>\n{orjson.dumps(response_data).decode()}\n</search_results>"
+
+@tool
+def search_knowledge_base_batch(queries: List[str], top_k: int = 3) -> str:
+    """
+    Search the knowledge base for several queries at once.
+    Prefer this over repeated search_knowledge_base calls when planning multiple searches.
+    
+    Args:
+        queries (List[str]): The search queries - REQUIRED
+        top_k (int): Number of top results to return per query (default: 3)
         
-        # Create response with relevance metadata and validation info
-        response_data = {
-            "results": formatted_results,
-            "relevance_score": relevance_score,
-            "total_results": len(unique_results),
-            "duplicates_removed": len(results) - len(unique_results),
-            "query": query,
-            "validation_note": "Relevance score includes content validation to prevent false positives",
-            "formatted_for_evaluation": formatted_for_evaluation  # Add this for RAGAs evaluation
-        }
+    Returns:
+        str: JSON string with one search result entry (same fields as search_knowledge_base) per query;
+             entries for queries that could not be embedded carry an "error" field
+    """
+    if not queries or not isinstance(queries, list) or not all(isinstance(q, str) and q for q in queries):
+        return '{"error": "Queries parameter is required and must be a list of non-empty strings", "searches": []}'
+    
+    try:
+        retriever = _get_retriever()
         
-        # Convert to JSON string
-        response = json.dumps(response_data, indent=2)
+        # Serve repeated queries from the cache without embedding them
+        all_results = [semantic_cache.get_by_text(query, top_k) for query in queries]
+        unseen = [i for i, results in enumerate(all_results) if results is None]
+        query_embeddings, embedded = retriever.embed_batch_with_status([queries[i] for i in unseen])
+        # Fallback embeddings are random, so neither cached matches nor fresh hits for them
+        # mean anything; those queries are reported as failed instead of searched
+        failed = set()
+        for i, embedding, real in zip(unseen, query_embeddings, embedded):
+            if real:
+                all_results[i] = semantic_cache.get(embedding, top_k)
+            else:
+                failed.add(i)
         
-        # Log successful search with debug info
-        logger.info(f"Knowledge base search completed: {len(unique_results)} unique results (removed {len(results) - len(unique_results)} duplicates), relevance: {relevance_score:.2f}")
+        # Fetch the rest in one _msearch round-trip, re-ranked as search_knowledge_base ranks
+        # them, so the results can be shared through the cache
+        missing = [
+            (i, embedding) for i, embedding in zip(unseen, query_embeddings)
+            if all_results[i] is None and i not in failed
+        ]
+        if missing:
+            fetched = retriever.batch_search_by_vector_mmr(
+                [embedding for _, embedding in missing],
+                top_k=top_k,
+                mmr_lambda=DEFAULT_MMR_LAMBDA,
+                min_score=config.KB_MIN_SCORE or None
+            )
+            for (i, embedding), results in zip(missing, fetched):
+                all_results[i] = results
+                if results:
+                    semantic_cache.put(embedding, top_k, results, query=queries[i])
         
-        # Debug logging for relevance issues
-        if relevance_score < 0.3:
-            logger.debug(f"Low relevance detected for query '{query}': {relevance_score:.2f}")
-            for i, result in enumerate(formatted_results[:2]):  # Log first 2 results for debugging
-                logger.debug(f"Result {i+1}: {result['content'][:50]}... (score: {result['score']:.2f})")
+        searches = []
+        for i, (query, results) in enumerate(zip(queries, all_results)):
+            search = _build_search_response(query, results or [], top_k)
+            if i in failed:
+                search["error"] = "Query could not be embedded, so the knowledge base was not searched"
+            searches.append(search)
+        response = orjson.dumps({"searches": searches}).decode()
         
+        cached_count = len(queries) - len(missing) - len(failed)
+        logger.info(
+            f"Batch knowledge base search completed for {len(queries)} queries "
+            f"({cached_count} from cache, {len(failed)} not embedded)"
+        )
         return f"<search_results>\n{response}\n</search_results>"
         
     except Exception as e:
-        logger.error(f"Error searching knowledge base: {e}")
+        logger.error(f"Error batch searching knowledge base: {e}")
         error_response = {
             "error": f"Error searching knowledge base: {str(e)}",
-            "results": [],
-            "relevance_score": 0.0,
-            "query": query
+            "searches": [],
+            "queries": queries
         }
-        return json.dumps(error_response)
+        return orjson.dumps(error_response).decode()
 
 @tool
 def check_knowledge_status() -> str:
@@ -501,8 +835,12 @@ def check_knowledge_status() -> str:
     Returns:
         str: JSON string with knowledge base status
     """
+    cached = knowledge_status_cache.get("kb_status")
+    if cached is not None:
+        return cached
+    
     try:
-        retriever = EmbeddingRetriever()
+        retriever = _get_retriever()
         count = retriever.get_document_count()
         
         # Format as compact JSON to reduce token usage
@@ -511,11 +849,12 @@ def check_knowledge_status() -> str:
             "document_count": count,
             "last_updated": datetime.now().strftime("%Y-%m-%d")
         }
-        response = json.dumps(status_data)
+        response = orjson.dumps(status_data).decode()
         
         # Log successful status check
         logger.info(f"Knowledge base status checked: {count} documents")
         
+        knowledge_status_cache.set("kb_status", response)
         return response
         
     except Exception as e:
@@ -523,35 +862,88 @@ def check_knowledge_status() -> str:
         error_msg = f'{{"error": "Failed to check knowledge status: {str(e)}", "status": "error"}}'
         return error_msg
 
-# Create the supervisor agent with tracing and enhanced tools including MCP tools
-def create_supervisor_agent_with_mcp():
-    """Create supervisor agent with MCP tools integrated using proper context manager"""
-    
-    # Get MCP client
-    mcp_client = get_tavily_mcp_client()
-    
-    if mcp_client:
-        # Use the MCP client context manager as per Strands SDK documentation
-        with mcp_client:
-            # Get the tools from the MCP server
-            mcp_tools = mcp_client.list_tools_sync()
-            logger.info(f"Loaded {len(mcp_tools)} MCP tools from Tavily server")
-            
-            # Combine local tools with MCP tools
-            all_tools = [
-                check_chunks_relevance,
-                search_knowledge_base, 
-                check_knowledge_status, 
-                file_read, 
-                file_write
-            ] + mcp_tools
-            
-            # Create agent within the MCP context
-            return create_traced_agent(
-                Agent,
-                model=get_reasoning_model(),
-                tools=all_tools,
-                system_prompt="""
+# Local tools and system prompts shared by every supervisor agent factory, built once at import
+SUPERVISOR_TOOLS = [
+    check_chunks_relevance,
+    search_knowledge_base,
+    search_knowledge_base_batch,
+    check_knowledge_status,
+    file_read,
+    file_write
+]
+
+# Tools that need an active Tavily MCP session on top of the local ones
+SUPERVISOR_WEB_TOOLS = SUPERVISOR_TOOLS + [smart_search]
+
+SUPERVISOR_SYSTEM_PROMPT = """You are a RAG system. Answer questions using retrieved information from the knowledge base.
+
+WORKFLOW:
+1. Start with check_knowledge_status() - verify knowledge base first (see IMPORTANT)
+2. search_knowledge_base(query="terms") - search internal data
+3. Use the retrieved information to answer questions
+4. When writing files, ALWAYS use the output directory - call file_write with filename parameter only
+5. Cite sources clearly
+
+TOOLS AVAILABLE:
+- check_knowledge_status(): Check KB status - call this first (see IMPORTANT)
+- search_knowledge_base(query): Search KB (returns relevance_score)
+- search_knowledge_base_batch(queries, top_k): Search KB for several queries in one round-trip - prefer it when you plan multiple searches
+- file_read(path): Read files
+- file_write(content, filename): Write files to output directory (use filename parameter, not path)
+
+IMPORTANT: 
+- ALWAYS start with check_knowledge_status(), unless the request begins with a [PRECOMPUTED CONTEXT] block: then it has already run, together with the first search_knowledge_base() when the knowledge base was ready - use those results instead of calling them again, and search yourself if no search was run or the knowledge base has been embedded since
+- ALWAYS use filename parameter (not path) for file_write to save to output directory
+
+FORMAT: Be concise, cite sources, use bullets when helpful"""
+
+SUPERVISOR_WEB_SYSTEM_PROMPT = """You are a RAG system with web search capabilities and advanced relevance evaluation. Answer questions using retrieved info and real-time web data.
+
+ENHANCED WORKFLOW WITH RAG EVALUATION:
+1. Start with check_knowledge_status() - verify knowledge base first (see IMPORTANT)
+2. search_knowledge_base(query="terms") - search internal data (returns JSON with formatted_for_evaluation field)
+3. EVALUATE RELEVANCE: Use check_chunks_relevance(results=formatted_for_evaluation, question=original_query)
+   - This returns {"chunk_relevance_score": "yes"/"no", "chunk_relevance_value": float}
+4. DECISION POINT:
+   - If chunk_relevance_score is "yes" (score > 0.5): Use RAG results to answer
+   - If chunk_relevance_score is "no" (score <= 0.5): Use web_search for better results
+   - For time-sensitive queries (weather, news, "today", "current"): Always use web_search
+5. When writing files, ALWAYS use the output directory - call file_write with filename parameter only
+6. Cite sources clearly and mention which evaluation method was used
+
+TOOLS AVAILABLE:
+- check_knowledge_status(): Check KB status - call this first (see IMPORTANT)
+- search_knowledge_base(query): Search KB (returns JSON with formatted_for_evaluation field)
+- search_knowledge_base_batch(queries, top_k): Search KB for several queries in one round-trip - prefer it when you plan multiple searches
+- check_chunks_relevance(results, question): Evaluate relevance using RAGAs (use formatted_for_evaluation field)
+- smart_search(query, top_k, max_results): Search KB and web concurrently in one call - returns web results only when KB relevance is low
+- web_search(query, max_results, search_depth, include_answer): MCP tool for web search
+- news_search(query, max_results, days_back): MCP tool for news search
+- health_check(): MCP tool to check Tavily service status
+- file_read(path): Read files
+- file_write(content, filename): Write files to output directory (use filename parameter, not path)
+
+ENHANCED DECISION LOGIC:
+1. FIRST: check_knowledge_status() (see IMPORTANT)
+2. SECOND: search_knowledge_base(query) to get results with formatted_for_evaluation
+3. THIRD: check_chunks_relevance(results=formatted_for_evaluation, question=original_query)
+4. DECISION:
+   - If chunk_relevance_score is "yes": Use RAG results
+   - If chunk_relevance_score is "no": Use web_search
+   - For weather/news/current events: Skip evaluation, use web_search directly
+5. FINAL: When saving files, use file_write(content, filename) - files go to output directory automatically
+
+FORMAT: Be concise, cite sources, use bullets when helpful, mention evaluation results
+
+IMPORTANT: 
+- ALWAYS start with check_knowledge_status(), unless the request begins with a [PRECOMPUTED CONTEXT] block: then it has already run, together with the first search_knowledge_base() when the knowledge base was ready - use those results instead of calling them again, and search yourself if no search was run or the knowledge base has been embedded since
+- ALWAYS evaluate chunk relevance before deciding between RAG and web search, unless search_knowledge_base returned "needs_web_search": true - then use web_search directly
+- ALWAYS use filename parameter (not path) for file_write to save to output directory
+- Be transparent about which source provided the information and the relevance evaluation results"""
+
+# Prompts for create_supervisor_agent_with_mcp: with MCP the agent decides on the
+# search relevance_score, without MCP it evaluates chunks with RAGAs
+SUPERVISOR_SCORE_WEB_SYSTEM_PROMPT = """
 You are a RAG system with web search capabilities. Answer questions using retrieved info and real-time web data.
 
 WORKFLOW:
@@ -565,6 +957,8 @@ WORKFLOW:
 TOOLS AVAILABLE:
 - check_knowledge_status(): Check KB status - ALWAYS CALL THIS FIRST
 - search_knowledge_base(query): Search KB (returns JSON with relevance_score)
+- search_knowledge_base_batch(queries, top_k): Search KB for several queries in one round-trip - prefer it when you plan multiple searches
+- smart_search(query, top_k, max_results): Search KB and web concurrently in one call - returns web results only when KB relevance is low
 - web_search(query, max_results, search_depth, include_answer): MCP tool for web search
 - news_search(query, max_results, days_back): MCP tool for news search
 - health_check(): MCP tool to check Tavily service status
@@ -584,24 +978,9 @@ FORMAT: Be concise, cite sources, use bullets when helpful
 IMPORTANT: 
 - ALWAYS start with check_knowledge_status()
 - ALWAYS use filename parameter (not path) for file_write to save to output directory
-""",
-                session_id="supervisor-session",
-                user_id="system"
-            )
-    else:
-        # Fallback: create agent without MCP tools
-        logger.warning("Creating agent without MCP tools due to client unavailability")
-        return create_traced_agent(
-            Agent,
-            model=get_reasoning_model(),
-            tools=[
-                check_chunks_relevance,
-                search_knowledge_base, 
-                check_knowledge_status, 
-                file_read, 
-                file_write
-            ],
-            system_prompt="""
+"""
+
+SUPERVISOR_EVAL_SYSTEM_PROMPT = """
 You are a RAG system with advanced relevance evaluation. Answer questions using retrieved information from the knowledge base.
 
 ENHANCED WORKFLOW WITH RAG EVALUATION:
@@ -618,6 +997,7 @@ ENHANCED WORKFLOW WITH RAG EVALUATION:
 TOOLS AVAILABLE:
 - check_knowledge_status(): Check KB status - ALWAYS CALL THIS FIRST
 - search_knowledge_base(query): Search KB (returns JSON with formatted_for_evaluation field)
+- search_knowledge_base_batch(queries, top_k): Search KB for several queries in one round-trip - prefer it when you plan multiple searches
 - check_chunks_relevance(results, question): Evaluate relevance using RAGAs (use formatted_for_evaluation field)
 - file_read(path): Read files
 - file_write(content, filename): Write files to output directory (use filename parameter, not path)
@@ -638,7 +1018,40 @@ IMPORTANT:
 - Be transparent about relevance evaluation results
 
 FORMAT: Be concise, cite sources, use bullets when helpful, mention evaluation results
-""",
+"""
+
+# Create the supervisor agent with tracing and enhanced tools including MCP tools
+def create_supervisor_agent_with_mcp():
+    """Create supervisor agent with MCP tools over the shared Tavily MCP session"""
+    
+    # Get MCP client with its shared session open
+    mcp_client = ensure_tavily_mcp_session()
+    
+    if mcp_client:
+        # The shared MCP session stays open for the process, so there is no per-query reconnect
+        # Get the MCP tools, listed once per process and cached
+        mcp_tools = list(get_tavily_tools(mcp_client).values())
+        
+        # Combine local tools with MCP tools
+        all_tools = SUPERVISOR_WEB_TOOLS + mcp_tools
+        
+        # Create agent with all tools
+        return create_traced_agent(
+            Agent,
+            model=get_reasoning_model(),
+            tools=all_tools,
+            system_prompt=SUPERVISOR_SCORE_WEB_SYSTEM_PROMPT,
+            session_id="supervisor-session",
+            user_id="system"
+        )
+    else:
+        # Fallback: create agent without MCP tools
+        logger.warning("Creating agent without MCP tools due to client unavailability")
+        return create_traced_agent(
+            Agent,
+            model=get_reasoning_model(),
+            tools=SUPERVISOR_TOOLS,
+            system_prompt=SUPERVISOR_EVAL_SYSTEM_PROMPT,
             session_id="supervisor-session",
             user_id="system"
         )
@@ -647,20 +1060,21 @@ FORMAT: Be concise, cite sources, use bullets when helpful, mention evaluation r
 class SupervisorAgentWrapper:
     """Wrapper to handle MCP client context for supervisor agent"""
     
-    def __init__(self):
+    def __init__(self, session_id: str = "supervisor-session"):
         self.mcp_client = None
         self.agent = None
+        self.session_id = session_id
         self._initialized = False
     
     def _ensure_initialized(self):
         """Ensure the agent is initialized, with lazy loading"""
         if not self._initialized:
             try:
-                self.mcp_client = get_tavily_mcp_client()
+                self.mcp_client = ensure_tavily_mcp_session()
                 self._create_agent()
                 self._initialized = True
             except Exception as e:
-                logger.error(f"Failed to initialize supervisor agent: {e}")
+                logger.error(f"Failed to initialize supervisor agent {self.session_id}: {e}")
                 logger.warning("Creating agent without MCP tools due to initialization failure")
                 self.mcp_client = None
                 self._create_agent_without_mcp()
@@ -673,40 +1087,13 @@ class SupervisorAgentWrapper:
     
     def _create_agent_without_mcp(self):
         """Create agent without MCP tools"""
-        logger.warning("Creating supervisor agent without MCP tools")
+        logger.warning(f"Creating supervisor agent {self.session_id} without MCP tools")
         self.agent = create_traced_agent(
             Agent,
             model=get_reasoning_model(),
-            tools=[
-                check_chunks_relevance,
-                search_knowledge_base, 
-                check_knowledge_status, 
-                file_read, 
-                file_write
-            ],
-            system_prompt="""
-You are a RAG system. Answer questions using retrieved information from the knowledge base.
-
-WORKFLOW:
-1. ALWAYS start with check_knowledge_status() - verify knowledge base first
-2. search_knowledge_base(query="terms") - search internal data
-3. Use the retrieved information to answer questions
-4. When writing files, ALWAYS use the output directory - call file_write with filename parameter only
-5. Cite sources clearly
-
-TOOLS AVAILABLE:
-- check_knowledge_status(): Check KB status - ALWAYS CALL THIS FIRST
-- search_knowledge_base(query): Search KB (returns relevance_score)
-- file_read(path): Read files
-- file_write(content, filename): Write files to output directory (use filename parameter, not path)
-
-IMPORTANT: 
-- ALWAYS start with check_knowledge_status()
-- ALWAYS use filename parameter (not path) for file_write to save to output directory
-
-FORMAT: Be concise, cite sources, use bullets when helpful
-""",
-            session_id="supervisor-session",
+            tools=SUPERVISOR_TOOLS,
+            system_prompt=SUPERVISOR_SYSTEM_PROMPT,
+            session_id=self.session_id,
             user_id="system"
         )
     
@@ -714,225 +1101,44 @@ FORMAT: Be concise, cite sources, use bullets when helpful
         """Call the agent with proper MCP context"""
         self._ensure_initialized()
         if self.mcp_client:
-            # Use context manager for the entire agent lifecycle
-            with self.mcp_client:
-                # Create agent within context if needed
-                if not hasattr(self, '_agent_created_in_context'):
-                    # Get the tools from the MCP server within the context
-                    mcp_tools = self.mcp_client.list_tools_sync()
-                    logger.info(f"Loaded {len(mcp_tools)} MCP tools from Tavily server")
-                    
-                    # Combine local tools with MCP tools
-                    all_tools = [
-                        check_chunks_relevance,
-                        search_knowledge_base, 
-                        check_knowledge_status, 
-                        file_read, 
-                        file_write
-                    ] + mcp_tools
-                    
-                    # Create agent with all tools within the MCP context
-                    self.agent = create_traced_agent(
-                        Agent,
-                        model=get_reasoning_model(),
-                        tools=all_tools,
-                        system_prompt="""You are a RAG system with web search capabilities. Answer questions using retrieved info and real-time web data.
-
-WORKFLOW:
-1. check_knowledge_status() - verify knowledge base
-2. search_knowledge_base(query="terms") - search internal data
-4. If recommendation is "USE_WEB_SEARCH": use web_search or news_search MCP tools
-5. If recommendation is "USE_RAG_RESULTS": use the RAG results
-6. Cite sources clearly
-
-TOOLS AVAILABLE:
-- check_knowledge_status(): Check KB status
-- search_knowledge_base(query): Search KB (returns relevance_score)
-- web_search(query, max_results, search_depth, include_answer): MCP tool for web search
-- news_search(query, max_results, days_back): MCP tool for news search
-- health_check(): MCP tool to check Tavily service status
-- file_read(path): Read files
-- file_write(content, path): Write files
-
-DECISION LOGIC:
-1. Always search knowledge base first
-3. Follow the recommendation (USE_WEB_SEARCH or USE_RAG_RESULTS)
-4. For weather, news, or current events: prefer web search
-5. For established knowledge: prefer RAG results
-
-FORMAT: Be concise, cite sources, use bullets when helpful""",
-                        session_id="supervisor-session",
-                        user_id="system"
-                    )
-                    self._agent_created_in_context = True
+            # The shared MCP session stays open for the process, so there is no per-query reconnect
+            # Create agent on first use
+            if not hasattr(self, '_agent_created_in_context'):
+                # Get the MCP tools, listed once per process and cached
+                mcp_tools = list(get_tavily_tools(self.mcp_client).values())
+                
+                # Combine local tools with MCP tools
+                all_tools = SUPERVISOR_WEB_TOOLS + mcp_tools
                 
-                # Execute the agent within the MCP context
-                return self.agent(query)
+                # Create agent with all tools
+                self.agent = create_traced_agent(
+                    Agent,
+                    model=get_reasoning_model(),
+                    tools=all_tools,
+                    system_prompt=SUPERVISOR_WEB_SYSTEM_PROMPT,
+                    session_id=self.session_id,
+                    user_id="system"
+                )
+                self._agent_created_in_context = True
+            
+            # Execute the agent; MCP tools call through the shared session, reopened here if it died
+            ensure_tavily_mcp_session()
+            return self.agent(query)
         else:
             return self.agent(query)
 
 # Create the default supervisor agent
 supervisor_agent = SupervisorAgentWrapper()
 
-def create_fresh_supervisor_agent():
+def create_fresh_supervisor_agent(fresh_session_id: str = None) -> SupervisorAgentWrapper:
     """
     Create a fresh supervisor agent instance with no conversation history.
     This ensures each query starts with a clean context window.
     """
-    import uuid
-    
-    # Create a unique session ID for each fresh agent
-    fresh_session_id = f"supervisor-{uuid.uuid4().hex[:8]}"
-    
-    # Return a fresh wrapper instance
-def create_fresh_supervisor_agent(fresh_session_id: str = None):
-    """Create a fresh supervisor agent with a new session ID and proper MCP context management"""
     if fresh_session_id is None:
         fresh_session_id = f"fresh-supervisor-{uuid.uuid4().hex[:8]}"
     
-    class FreshSupervisorAgentWrapper:
-        """Fresh wrapper to handle MCP client context for supervisor agent"""
-        
-        def __init__(self, session_id):
-            self.mcp_client = None
-            self.agent = None
-            self.session_id = session_id
-            self._initialized = False
-        
-        def _ensure_initialized(self):
-            """Ensure the agent is initialized, with lazy loading"""
-            if not self._initialized:
-                try:
-                    self.mcp_client = get_tavily_mcp_client()
-                    self._create_agent()
-                    self._initialized = True
-                except Exception as e:
-                    logger.error(f"Failed to create fresh agent with MCP tools: {e}")
-                    logger.warning("Creating fresh agent without MCP tools due to MCP failure")
-                    self.mcp_client = None
-                    self._create_agent_without_mcp()
-                    self._initialized = True
-        
-        def _create_agent(self):
-            """Prepare for agent creation - actual creation happens in __call__ within MCP context"""
-            if not self.mcp_client:
-                self._create_agent_without_mcp()
-        
-        def _create_agent_without_mcp(self):
-            """Create agent without MCP tools"""
-            logger.warning("Creating fresh agent without MCP tools due to client unavailability")
-            self.agent = create_traced_agent(
-                Agent,
-                model=get_reasoning_model(),
-                tools=[
-                    check_chunks_relevance,
-                    search_knowledge_base, 
-                    check_knowledge_status, 
-                    file_read, 
-                    file_write
-                ],
-                system_prompt="""You are a RAG system. Answer questions using retrieved information from the knowledge base.
-
-WORKFLOW:
-1. ALWAYS start with check_knowledge_status() - verify knowledge base first
-2. search_knowledge_base(query="terms") - search internal data
-3. Use the retrieved information to answer questions
-4. When writing files, ALWAYS use the output directory - call file_write with filename parameter only
-5. Cite sources clearly
-
-TOOLS AVAILABLE:
-- check_knowledge_status(): Check KB status - ALWAYS CALL THIS FIRST
-- search_knowledge_base(query): Search KB (returns relevance_score)
-- file_read(path): Read files
-- file_write(content, filename): Write files to output directory (use filename parameter, not path)
-
-IMPORTANT: 
-- ALWAYS start with check_knowledge_status()
-- ALWAYS use filename parameter (not path) for file_write to save to output directory
-
-FORMAT: Be concise, cite sources, use bullets when helpful""",
-                session_id=self.session_id,
-                user_id="system"
-            )
-        
-        def __call__(self, query: str):
-            """Call the agent with proper MCP context"""
-            self._ensure_initialized()
-            if self.mcp_client:
-                # Use context manager for the entire agent lifecycle
-                with self.mcp_client:
-                    # Create agent within context if needed
-                    if not hasattr(self, '_agent_created_in_context'):
-                        # Get the tools from the MCP server within the context
-                        mcp_tools = self.mcp_client.list_tools_sync()
-                        logger.info(f"Loaded {len(mcp_tools)} MCP tools from Tavily server for fresh agent")
-                        
-                        # Combine local tools with MCP tools
-                        all_tools = [
-                            check_chunks_relevance,
-                            search_knowledge_base, 
-                            check_knowledge_status, 
-                            file_read, 
-                            file_write
-                        ] + mcp_tools
-                        
-                        # Create agent with all tools within the MCP context
-                        self.agent = create_traced_agent(
-                            Agent,
-                            model=get_reasoning_model(),
-                            tools=all_tools,
-                            system_prompt="""You are a RAG system with web search capabilities and advanced relevance evaluation. Answer questions using retrieved info and real-time web data.
-
-ENHANCED WORKFLOW WITH RAG EVALUATION:
-1. ALWAYS start with check_knowledge_status() - verify knowledge base first
-2. search_knowledge_base(query="terms") - search internal data (returns JSON with formatted_for_evaluation field)
-3. EVALUATE RELEVANCE: Use check_chunks_relevance(results=formatted_for_evaluation, question=original_query)
-   - This returns {"chunk_relevance_score": "yes"/"no", "chunk_relevance_value": float}
-4. DECISION POINT:
-   - If chunk_relevance_score is "yes" (score > 0.5): Use RAG results to answer
-   - If chunk_relevance_score is "no" (score <= 0.5): Use web_search for better results
-   - For time-sensitive queries (weather, news, "today", "current"): Always use web_search
-5. When writing files, ALWAYS use the output directory - call file_write with filename parameter only
-6. Cite sources clearly and mention which evaluation method was used
-
-TOOLS AVAILABLE:
-- check_knowledge_status(): Check KB status - ALWAYS CALL THIS FIRST
-- search_knowledge_base(query): Search KB (returns JSON with formatted_for_evaluation field)
-- check_chunks_relevance(results, question): Evaluate relevance using RAGAs (use formatted_for_evaluation field)
-- web_search(query, max_results, search_depth, include_answer): MCP tool for web search
-- news_search(query, max_results, days_back): MCP tool for news search
-- health_check(): MCP tool to check Tavily service status
-- file_read(path): Read files
-- file_write(content, filename): Write files to output directory (use filename parameter, not path)
-
-ENHANCED DECISION LOGIC:
-1. FIRST: Always call check_knowledge_status()
-2. SECOND: search_knowledge_base(query) to get results with formatted_for_evaluation
-3. THIRD: check_chunks_relevance(results=formatted_for_evaluation, question=original_query)
-4. DECISION:
-   - If chunk_relevance_score is "yes": Use RAG results
-   - If chunk_relevance_score is "no": Use web_search
-   - For weather/news/current events: Skip evaluation, use web_search directly
-5. FINAL: When saving files, use file_write(content, filename) - files go to output directory automatically
-
-FORMAT: Be concise, cite sources, use bullets when helpful, mention evaluation results
-
-IMPORTANT: 
-- ALWAYS start with check_knowledge_status()
-- ALWAYS evaluate chunk relevance before deciding between RAG and web search
-- ALWAYS use filename parameter (not path) for file_write to save to output directory
-- Be transparent about which source provided the information and the relevance evaluation results""",
-                            session_id=self.session_id,
-                            user_id="system"
-                        )
-                        self._agent_created_in_context = True
-                    
-                    # Execute the agent within the MCP context
-                    return self.agent(query)
-            else:
-                return self.agent(query)
-    
-    return FreshSupervisorAgentWrapper(fresh_session_id)
+    return SupervisorAgentWrapper(fresh_session_id)
 
 # The supervisor_agent now has built-in tracing via Strands SDK and proper MCP integration
 # Export the agent and the fresh agent creator
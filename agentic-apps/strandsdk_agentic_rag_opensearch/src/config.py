@@ -36,15 +36,34 @@ class Config:
     LANGFUSE_HOST: str = os.getenv("LANGFUSE_HOST", "")
     LANGFUSE_PUBLIC_KEY: str = os.getenv("LANGFUSE_PUBLIC_KEY", "")
     LANGFUSE_SECRET_KEY: str = os.getenv("LANGFUSE_SECRET_KEY", "")
+    # Fraction of traces and spans recorded (1.0 records everything)
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
     
     # Application Configuration
     KNOWLEDGE_DIR: str = os.getenv("KNOWLEDGE_DIR", "knowledge")
     OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "output")
     EMBEDDING_ENDPOINT: str = os.getenv("EMBEDDING_ENDPOINT", "")
+    # Threads reading and parsing knowledge files in parallel; the work is mostly I/O-bound
+    KB_INGEST_WORKERS: int = int(os.getenv("KB_INGEST_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+    # Text files larger than this are streamed and split into overlapping chunks
+    MAX_FILE_BYTES: int = int(os.getenv("MAX_FILE_BYTES", str(8 * 1024 * 1024)))
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "3200"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "960"))
     
     # Vector Search Configuration
     VECTOR_INDEX_NAME: str = os.getenv("VECTOR_INDEX_NAME", "knowledge-embeddings")
     TOP_K_RESULTS: int = int(os.getenv("TOP_K_RESULTS", "5"))
+    # Similarity below which OpenSearch drops knowledge base hits (0 disables the filter)
+    KB_MIN_SCORE: float = float(os.getenv("KB_MIN_SCORE", "0"))
+    # Seconds a knowledge base status check is reused before OpenSearch is asked again
+    KB_STATUS_TTL: int = int(os.getenv("KB_STATUS_TTL", "30"))
+    # Head start smart_search gives the knowledge base before it also calls the web search
+    SMART_SEARCH_WEB_DELAY: float = float(os.getenv("SMART_SEARCH_WEB_DELAY", "0.5"))
+    
+    # Semantic Search Cache Configuration
+    SEMANTIC_CACHE_TAU: float = float(os.getenv("SEMANTIC_CACHE_TAU", "0.85"))
+    SEMANTIC_CACHE_TTL: int = int(os.getenv("SEMANTIC_CACHE_TTL", "300"))
+    SEMANTIC_CACHE_MAX: int = int(os.getenv("SEMANTIC_CACHE_MAX", "256"))
     
     @classmethod
     def is_langfuse_enabled(cls) -> bool:
@@ -63,6 +82,12 @@ class Config:
         
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+        
+        if not 0 <= cls.CHUNK_OVERLAP < cls.CHUNK_SIZE:
+            raise ValueError(
+                f"CHUNK_OVERLAP must be at least 0 and smaller than CHUNK_SIZE "
+                f"(got {cls.CHUNK_OVERLAP} and {cls.CHUNK_SIZE})"
+            )
 
 # Global config instance
 config = Config()
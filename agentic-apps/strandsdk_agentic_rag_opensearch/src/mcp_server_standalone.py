@@ -6,6 +6,7 @@ This runs as a separate service that the main application connects to.
 
 import sys
 import os
+import re
 import warnings
 import logging
 from dotenv import load_dotenv
@@ -16,6 +17,28 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 class CompleteAsyncErrorFilter:
     """Complete async error filter that suppresses all async-related output."""
     
+    # Comprehensive list of patterns to suppress, compiled once into a single alternation
+    SUPPRESS_PATTERNS = (
+        "RuntimeError",
+        "httpcore",
+        "_synchronization",
+        "asyncio",
+        "anyio",
+        "sniffio",
+        "await",
+        "async",
+        "CancelScope",
+        "shield",
+        "current_task",
+        "get_running_loop",
+        "cancel_shielded_checkpoint",
+        "_anyio_lock",
+        "acquire",
+        "raise RuntimeError",
+    )
+    SUPPRESS_RE = re.compile("|".join(re.escape(pattern) for pattern in SUPPRESS_PATTERNS))
+    SUPPRESS_EXACT = frozenset([":", "RuntimeError:", "RuntimeError: ", "RuntimeError", ""])
+    
     def __init__(self):
         self.original_stderr = sys.__stderr__
         
@@ -24,31 +47,11 @@ class CompleteAsyncErrorFilter:
         if not text.strip():
             return
             
-        # Comprehensive list of patterns to suppress
-        suppress_patterns = [
-            "RuntimeError",
-            "httpcore",
-            "_synchronization",
-            "asyncio",
-            "anyio",
-            "sniffio",
-            "await",
-            "async",
-            "CancelScope",
-            "shield",
-            "current_task",
-            "get_running_loop",
-            "cancel_shielded_checkpoint",
-            "_anyio_lock",
-            "acquire",
-            "raise RuntimeError",
-        ]
-        
         # Check if this line should be suppressed
-        should_suppress = any(pattern in text for pattern in suppress_patterns)
+        should_suppress = self.SUPPRESS_RE.search(text) is not None
         
         # Also suppress lines that are just punctuation or whitespace
-        if text.strip() in [":", "RuntimeError:", "RuntimeError: ", "RuntimeError", ""]:
+        if text.strip() in self.SUPPRESS_EXACT:
             should_suppress = True
         
         # Only write if not suppressed and contains meaningful content
@@ -71,8 +74,8 @@ def setup_complete_clean_environment():
     
     # Try to import and use existing cleanup if available
     try:
-        from src.utils.global_async_cleanup import setup_global_async_cleanup
-        setup_global_async_cleanup()
+        from src.utils.global_async_cleanup import ensure_clean_runtime
+        ensure_clean_runtime()
     except ImportError:
         pass
 
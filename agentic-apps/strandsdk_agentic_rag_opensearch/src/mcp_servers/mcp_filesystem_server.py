@@ -7,7 +7,7 @@ It demonstrates how to create MCP tools that can be used by the Strands agents.
 """
 
 import os
-import json
+import orjson
 from pathlib import Path
 from typing import Any, Dict
 from mcp.server import FastMCP
@@ -172,7 +172,7 @@ def get_path_info(path_to_check: str) -> str:
             "permissions": oct(stat.st_mode)[-3:]
         }
         
-        return json.dumps(info, indent=2)
+        return orjson.dumps(info).decode()
     except Exception as e:
         return f"Error getting info for {path_to_check}: {str(e)}"
 
@@ -7,7 +7,7 @@ It's designed to be called when RAG retrieval relevance is low.
 """
 
 import os
-import json
+import orjson
 import time
 import asyncio
 from typing import Dict, List, Any, Optional
@@ -185,7 +185,7 @@ async def web_search(
             "follow_up_questions": response.follow_up_questions or []
         }
         
-        return json.dumps(formatted_response, indent=2)
+        return orjson.dumps(formatted_response).decode()
         
     except Exception as e:
         error_response = {
@@ -194,7 +194,7 @@ async def web_search(
             "results": [],
             "answer": None
         }
-        return json.dumps(error_response, indent=2)
+        return orjson.dumps(error_response).decode()
 
 @mcp.tool(description="Search for recent news and current events")
 async def news_search(
@@ -246,7 +246,7 @@ async def news_search(
             "follow_up_questions": response.follow_up_questions or []
         }
         
-        return json.dumps(formatted_response, indent=2)
+        return orjson.dumps(formatted_response).decode()
         
     except Exception as e:
         error_response = {
@@ -255,7 +255,7 @@ async def news_search(
             "news_results": [],
             "answer": None
         }
-        return json.dumps(error_response, indent=2)
+        return orjson.dumps(error_response).decode()
 
 @mcp.tool(description="Get health check status of the Tavily search service")
 async def health_check() -> str:
@@ -283,7 +283,7 @@ async def health_check() -> str:
             "timestamp": time.time()
         }
         
-        return json.dumps(status, indent=2)
+        return orjson.dumps(status).decode()
         
     except Exception as e:
         status = {
@@ -293,7 +293,7 @@ async def health_check() -> str:
             "error": str(e),
             "timestamp": time.time()
         }
-        return json.dumps(status, indent=2)
+        return orjson.dumps(status).decode()
 
 if __name__ == "__main__":
     # Run the MCP server
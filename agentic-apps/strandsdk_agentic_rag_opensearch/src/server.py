@@ -8,9 +8,12 @@ Uses clean execution pattern to suppress async warnings.
 
 import sys
 import os
+import re
 import warnings
 import logging
 import asyncio
+import time
+import orjson
 from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
 
@@ -20,6 +23,30 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 class CompleteAsyncErrorFilter:
     """Complete async error filter that suppresses all async-related output."""
     
+    # Comprehensive list of patterns to suppress, compiled once into a single alternation
+    SUPPRESS_PATTERNS = (
+        "RuntimeError",
+        "httpcore",
+        "_synchronization",
+        "asyncio",
+        "anyio",
+        "sniffio",
+        "await",
+        "async",
+        "CancelScope",
+        "shield",
+        "current_task",
+        "get_running_loop",
+        "cancel_shielded_checkpoint",
+        "_anyio_lock",
+        "acquire",
+        "File \"/home/ubuntu/Cost_Effective_and_Scalable_Models_Inference_on_AWS_Graviton/agentic-apps/strandsdk_agentic_rag_opensearch/venv/lib/python3.10/site-packages/httpcore",
+        "File \"/usr/lib/python3.10/asyncio",
+        "raise RuntimeError",
+    )
+    SUPPRESS_RE = re.compile("|".join(re.escape(pattern) for pattern in SUPPRESS_PATTERNS))
+    SUPPRESS_EXACT = frozenset([":", "RuntimeError:", "RuntimeError: ", "RuntimeError", ""])
+    
     def __init__(self):
         self.original_stderr = sys.__stderr__
         
@@ -28,33 +55,11 @@ class CompleteAsyncErrorFilter:
         if not text.strip():
             return
             
-        # Comprehensive list of patterns to suppress
-        suppress_patterns = [
-            "RuntimeError",
-            "httpcore",
-            "_synchronization",
-            "asyncio",
-            "anyio",
-            "sniffio",
-            "await",
-            "async",
-            "CancelScope",
-            "shield",
-            "current_task",
-            "get_running_loop",
-            "cancel_shielded_checkpoint",
-            "_anyio_lock",
-            "acquire",
-            "File \"/home/ubuntu/Cost_Effective_and_Scalable_Models_Inference_on_AWS_Graviton/agentic-apps/strandsdk_agentic_rag_opensearch/venv/lib/python3.10/site-packages/httpcore",
-            "File \"/usr/lib/python3.10/asyncio",
-            "raise RuntimeError",
-        ]
-        
         # Check if this line should be suppressed
-        should_suppress = any(pattern in text for pattern in suppress_patterns)
+        should_suppress = self.SUPPRESS_RE.search(text) is not None
         
         # Also suppress lines that are just punctuation or whitespace
-        if text.strip() in [":", "RuntimeError:", "RuntimeError: ", "RuntimeError", ""]:
+        if text.strip() in self.SUPPRESS_EXACT:
             should_suppress = True
         
         # Only write if not suppressed and contains meaningful content
@@ -77,8 +82,8 @@ def setup_complete_clean_environment():
     
     # Try to import and use existing cleanup if available
     try:
-        from src.utils.global_async_cleanup import setup_global_async_cleanup
-        setup_global_async_cleanup()
+        from src.utils.global_async_cleanup import ensure_clean_runtime
+        ensure_clean_runtime()
     except ImportError:
         pass
 
@@ -93,7 +98,13 @@ import uvicorn
 
 from src.config import config
 from src.utils.logging import setup_logging, log_title
-from src.agents.supervisor_agent import supervisor_agent, create_fresh_supervisor_agent
+from src.agents.supervisor_agent import (
+    supervisor_agent,
+    create_fresh_supervisor_agent,
+    check_knowledge_status,
+    search_knowledge_base,
+    close_tavily_mcp_session
+)
 from src.agents.knowledge_agent import knowledge_agent
 from src.agents.mcp_agent import mcp_agent
 
@@ -178,14 +189,14 @@ async def lifespan(app: FastAPI):
         
         # Initialize MCP client during startup to avoid blocking during requests
         try:
-            from src.agents.supervisor_agent import get_tavily_mcp_client
-            mcp_client = get_tavily_mcp_client()
+            from src.agents.supervisor_agent import ensure_tavily_mcp_session, get_tavily_tools
+            # Open the shared MCP session that every query reuses
+            mcp_client = ensure_tavily_mcp_session()
             if mcp_client:
-                # Test MCP client connectivity
-                with mcp_client:
-                    tools = mcp_client.list_tools_sync()
-                    service_status["mcp_tools"] = f"ready ({len(tools)} tools)"
-                    logger.info(f"MCP client initialized successfully with {len(tools)} tools")
+                # Test MCP client connectivity and warm the tool cache used by every agent
+                tools = get_tavily_tools(mcp_client)
+                service_status["mcp_tools"] = f"ready ({len(tools)} tools)"
+                logger.info(f"MCP client initialized successfully with {len(tools)} tools")
             else:
                 service_status["mcp_tools"] = "unavailable"
                 logger.warning("MCP client initialization failed")
@@ -208,7 +219,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down FastAPI server...")
-    # No need to terminate Tavily server as it's running in a separate Kubernetes service
+    # No need to terminate Tavily server as it's running in a separate Kubernetes service,
+    # only the shared MCP session to it
+    close_tavily_mcp_session()
 
 async def check_tavily_server():
     """Check if the Tavily MCP server is accessible via Kubernetes service."""
@@ -297,11 +310,37 @@ async def root():
         }
     }
 
+def _knowledge_base_ready(status: str) -> bool:
+    """Whether a check_knowledge_status() response reports a populated index."""
+    try:
+        return orjson.loads(status).get("status") == "ready"
+    except (orjson.JSONDecodeError, AttributeError):
+        return False
+
+async def _prelude(query: str) -> str:
+    """Run the status check and, if the index has documents, the initial knowledge base search.
+
+    Both are handed to the agent up front instead of costing two tool turns. The status
+    is usually served from its cache, so checking it before searching adds little latency.
+    """
+    status = await asyncio.to_thread(check_knowledge_status)
+    if _knowledge_base_ready(status):
+        search_results = await asyncio.to_thread(search_knowledge_base, query)
+        search_line = f"search_knowledge_base(query=original question): {search_results}\n"
+    else:
+        search_line = "search_knowledge_base(): not run because the knowledge base is not ready\n"
+    return (
+        "[PRECOMPUTED CONTEXT]\n"
+        f"check_knowledge_status(): {status}\n"
+        f"{search_line}"
+        "[END PRECOMPUTED CONTEXT]\n\n"
+        f"Question: {query}"
+    )
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest, background_tasks: BackgroundTasks):
     """Process a query using the multi-agent system."""
-    import time
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     try:
         logger.info(f"Processing query: {request.question[:50]}...")
@@ -319,8 +358,11 @@ async def process_query(request: QueryRequest, background_tasks: BackgroundTasks
         # Create a fresh agent instance for each query to avoid context accumulation
         fresh_agent = create_fresh_supervisor_agent()
         
-        # Process the query
-        response = fresh_agent(query)
+        # Status check and first search run concurrently before the agent starts
+        agent_input = await _prelude(query)
+        
+        # Process the query off the event loop
+        response = await asyncio.to_thread(fresh_agent, agent_input)
         
         # Ensure response is properly formatted
         if response is None:
@@ -335,7 +377,7 @@ async def process_query(request: QueryRequest, background_tasks: BackgroundTasks
             logger.warning("Response too long, truncating to 4000 characters")
             response_str = response_str[:4000] + "... [Response truncated due to length]"
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         logger.info(f"Query processed successfully in {processing_time:.2f}s")
         
         return QueryResponse(
@@ -346,7 +388,7 @@ async def process_query(request: QueryRequest, background_tasks: BackgroundTasks
         )
         
     except Exception as e:
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         # Always log the error for debugging, but filter display for async-related errors
         error_msg = str(e)
@@ -461,6 +503,8 @@ def run_server():
         port=8000,
         reload=False,
         log_level="info",
+        loop="uvloop",  # Faster event loop (installed via uvicorn[standard])
+        http="httptools",  # C HTTP parser instead of h11
         timeout_keep_alive=900,  # 15 minutes keep-alive timeout
         timeout_graceful_shutdown=30,  # 30 seconds graceful shutdown
         limit_max_requests=1000,  # Limit max requests per worker
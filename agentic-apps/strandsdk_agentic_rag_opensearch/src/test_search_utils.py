@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the search caches, MMR re-ranking, score conversion and text windowing
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Skip rather than fail at collection when numpy, strands or the OpenSearch client
+# libraries these modules import are not installed
+pytest.importorskip("numpy")
+pytest.importorskip("src.tools.embedding_retriever")
+pytest.importorskip("src.agents.knowledge_agent")
+
+from src.tools.semantic_cache import SemanticCache
+from src.tools.ttl_cache import TTLCache
+from src.tools.embedding_retriever import mmr_select
+from src.tools.opensearch_vector_store import innerproduct_to_cosine_score, cosine_to_innerproduct_score
+from src.agents.knowledge_agent import _iter_text_windows
+
+RESULTS = [{"content": "a", "source": "a.md", "score": 0.9, "id": "1"},
+           {"content": "b", "source": "b.md", "score": 0.8, "id": "2"}]
+
+def test_semantic_cache_hit():
+    """Similar query embeddings and identical query text are served from the cache"""
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=4)
+    cache.put([1.0, 0.0, 0.0], 2, RESULTS, query="what is eks")
+
+    assert cache.get([0.99, 0.05, 0.0], 2) == RESULTS
+    assert cache.get([2.0, 0.0, 0.0], 1) == RESULTS[:1]
+    assert cache.get_by_text("what is eks", 2) == RESULTS
+
+def test_semantic_cache_miss():
+    """Dissimilar queries, larger top_k and unseen text miss"""
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=4)
+    assert cache.get([1.0, 0.0, 0.0], 2) is None
+
+    cache.put([1.0, 0.0, 0.0], 2, RESULTS, query="what is eks")
+    assert cache.get([0.0, 1.0, 0.0], 2) is None
+    assert cache.get([0.7, 0.7, 0.0], 2) is None
+    assert cache.get([1.0, 0.0, 0.0], 3) is None
+    assert cache.get([1.0, 0.0], 2) is None
+    assert cache.get_by_text("what is ecs", 2) is None
+
+def test_semantic_cache_expiry():
+    """Entries stop matching once their TTL has passed"""
+    cache = SemanticCache(threshold=0.9, ttl=0.05, max_entries=4)
+    cache.put([1.0, 0.0, 0.0], 2, RESULTS, query="what is eks")
+    time.sleep(0.1)
+
+    assert cache.get([1.0, 0.0, 0.0], 2) is None
+    assert cache.get_by_text("what is eks", 2) is None
+
+def test_semantic_cache_evicts_least_recently_used():
+    """A full cache drops the entry that was used longest ago"""
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=2)
+    cache.put([1.0, 0.0, 0.0], 2, RESULTS, query="x")
+    cache.put([0.0, 1.0, 0.0], 2, RESULTS, query="y")
+    assert cache.get([1.0, 0.0, 0.0], 2) is not None
+    cache.put([0.0, 0.0, 1.0], 2, RESULTS, query="z")
+
+    assert cache.get([0.0, 1.0, 0.0], 2) is None
+    assert cache.get_by_text("y", 2) is None
+    assert cache.get([1.0, 0.0, 0.0], 2) is not None
+    assert cache.get_by_text("z", 2) is not None
+
+def test_semantic_cache_clear():
+    """clear() drops every entry"""
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=4)
+    cache.put([1.0, 0.0, 0.0], 2, RESULTS, query="x")
+    cache.clear()
+
+    assert cache.get([1.0, 0.0, 0.0], 2) is None
+    assert cache.get_by_text("x", 2) is None
+
+def test_semantic_cache_disabled():
+    """max_entries=0 turns put and the lookups into no-ops instead of failing"""
+    cache = SemanticCache(threshold=0.9, ttl=60, max_entries=0)
+    cache.put([1.0, 0.0, 0.0], 2, RESULTS, query="x")
+
+    assert cache.get([1.0, 0.0, 0.0], 2) is None
+    assert cache.get_by_text("x", 2) is None
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Setting past max_items evicts the least recently read or written key"""
+    cache = TTLCache(max_items=2, ttl_sec=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_ttl_cache_expiry_and_clear():
+    """Entries expire after ttl_sec and clear() drops the rest"""
+    cache = TTLCache(max_items=4, ttl_sec=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+    cache = TTLCache(max_items=4, ttl_sec=60)
+    cache.set("b", 2)
+    cache.clear()
+    assert cache.get("b") is None
+
+def test_mmr_select_ordering():
+    """Pure relevance ranks by similarity; a diversity weight demotes near-duplicates"""
+    query = [1.0, 0.0]
+    docs = [[1.0, 0.0], [0.99, 0.141], [0.8, 0.6]]
+
+    assert mmr_select(query, docs, top_k=3, mmr_lambda=1.0) == [0, 1, 2]
+    assert mmr_select(query, docs, top_k=3, mmr_lambda=0.3) == [0, 2, 1]
+    assert mmr_select(query, docs, top_k=2, mmr_lambda=0.3) == [0, 2]
+
+def test_mmr_select_small_and_zero_vectors():
+    """top_k beyond the candidate count returns every document, zero vectors included"""
+    selected = mmr_select([1.0, 0.0], [[0.0, 0.0], [1.0, 0.0]], top_k=5)
+    assert sorted(selected) == [0, 1]
+    assert selected[0] == 1
+
+@pytest.mark.parametrize("cosine_score", [0.0, 0.1, 0.25, 0.5, 0.75, 1.0])
+def test_score_conversion_round_trip(cosine_score):
+    """Converting a threshold to innerproduct units and back is lossless"""
+    raw = cosine_to_innerproduct_score(cosine_score)
+    assert innerproduct_to_cosine_score(raw) == pytest.approx(cosine_score)
+
+def test_innerproduct_to_cosine_score_known_values():
+    """OpenSearch innerproduct scores for dot products of 1, 0 and -1 map onto 1, 0.5 and 0"""
+    assert innerproduct_to_cosine_score(2.0) == pytest.approx(1.0)
+    assert innerproduct_to_cosine_score(1.0) == pytest.approx(0.5)
+    assert innerproduct_to_cosine_score(0.5) == pytest.approx(0.0)
+
+def test_iter_text_windows_overlap():
+    """Consecutive windows share overlap characters and a tail inside the overlap is not repeated"""
+    windows = list(_iter_text_windows(io.StringIO("abcdefghij"), chunk_size=4, overlap=1))
+    assert windows == ["abcd", "defg", "ghij"]
+
+def test_iter_text_windows_short_final_block():
+    """A final block shorter than chunk_size is still emitted"""
+    windows = list(_iter_text_windows(io.StringIO("abcdefghijk"), chunk_size=4, overlap=1))
+    assert windows == ["abcd", "defg", "ghij", "jk"]
+
+def test_iter_text_windows_overlap_not_below_chunk_size():
+    """An overlap of chunk_size or more still advances one character per window"""
+    windows = list(_iter_text_windows(io.StringIO("abcdef"), chunk_size=4, overlap=4))
+    assert windows == ["abcd", "bcde", "cdef"]
+    windows = list(_iter_text_windows(io.StringIO("abcdef"), chunk_size=4, overlap=10))
+    assert windows == ["abcd", "bcde", "cdef"]
+
+def test_iter_text_windows_negative_overlap():
+    """A negative overlap is treated as none, so no text is skipped"""
+    windows = list(_iter_text_windows(io.StringIO("abcdefghij"), chunk_size=4, overlap=-3))
+    assert windows == ["abcd", "efgh", "ij"]
+
+def test_iter_text_windows_short_and_blank_files():
+    """Files shorter than one window yield themselves, blank files yield nothing"""
+    assert list(_iter_text_windows(io.StringIO("ab"), chunk_size=4, overlap=1)) == ["ab"]
+    assert list(_iter_text_windows(io.StringIO(" \n"), chunk_size=4, overlap=1)) == []
@@ -1,31 +1,99 @@
 """Embedding retriever for RAG functionality."""
 
+import asyncio
 import logging
-import math
 import random
-from typing import List, Dict, Any, Optional
+import numpy as np
+import orjson
+from typing import List, Dict, Any, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .opensearch_vector_store import OpenSearchVectorStore
 from ..config import config
 from ..utils.logging import log_title
 
 logger = logging.getLogger(__name__)
 
+def mmr_select(query_vector: List[float], doc_vectors: List[List[float]], top_k: int, mmr_lambda: float = 0.7) -> List[int]:
+    """
+    Pick top_k document indices by Maximal Marginal Relevance.
+    
+    Each step takes the document maximising
+    mmr_lambda * sim(query, doc) - (1 - mmr_lambda) * max sim(doc, selected),
+    keeping a running maximum so every step costs one matrix-vector product.
+    """
+    docs = np.asarray(doc_vectors, dtype=np.float32)
+    norms = np.linalg.norm(docs, axis=1, keepdims=True)
+    docs = docs / np.where(norms == 0, 1, norms)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    if query_norm:
+        query = query / query_norm
+    
+    query_similarity = docs @ query
+    selected = [int(np.argmax(query_similarity))]
+    max_selected_similarity = docs @ docs[selected[0]]
+    
+    while len(selected) < min(top_k, len(docs)):
+        scores = mmr_lambda * query_similarity - (1 - mmr_lambda) * max_selected_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(max_selected_similarity, docs @ docs[best], out=max_selected_similarity)
+    
+    return selected
+
 class EmbeddingRetriever:
     """Handles embedding generation and retrieval operations."""
     
+    # Maximum concurrent searches issued from async callers, to avoid overwhelming the cluster
+    ASYNC_CONCURRENCY = 8
+    
     def __init__(self, embedding_model: str = None):
         self.embedding_model = embedding_model or config.EMBEDDING_MODEL
         self.vector_store = OpenSearchVectorStore()
         self.embedding_endpoint = config.EMBEDDING_BASE_URL
         self.api_key = config.EMBEDDING_API_KEY
         self.target_dimension = 384  # Target dimension for embeddings
+        self.session = self._create_session()
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {self.api_key}'
+        })
+        
+        # Check if the endpoint already ends with /embeddings
+        if self.embedding_endpoint.endswith('/embeddings'):
+            self.request_url = self.embedding_endpoint
+        else:
+            self.request_url = f"{self.embedding_endpoint}/embeddings"
+        
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Create a keep-alive HTTP session for the embedding endpoint."""
+        # Embedding requests are idempotent, so POST is safe to retry on gateway errors
+        retry = Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=frozenset(["POST"]),
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
     
     def embed_document(self, document: str) -> List[float]:
         """Embed a document and add it to the vector store."""
         log_title('EMBEDDING DOCUMENT')
-        embedding = self.embed(document)
-        self.vector_store.add_embedding(embedding, document)
+        embedding, embedded = self.embed_with_status(document)
+        if embedded:
+            self.vector_store.add_embedding(embedding, document)
+        else:
+            logger.warning("Not indexing document: embedding API unavailable, got a fallback vector")
         return embedding
     
     def embed_query(self, query: str) -> List[float]:
@@ -35,64 +103,57 @@ class EmbeddingRetriever:
     
     def generate_random_embedding(self) -> List[float]:
         """Generate a random embedding as fallback."""
-        return [random.uniform(-1, 1) for _ in range(self.target_dimension)]
+        return self.normalize_vector([random.uniform(-1, 1) for _ in range(self.target_dimension)])
     
     def normalize_vector(self, vector: List[float]) -> List[float]:
         """Normalize a vector to unit length."""
-        magnitude = math.sqrt(sum(val * val for val in vector))
+        arr = np.asarray(vector, dtype=np.float64)
+        magnitude = np.linalg.norm(arr)
         if magnitude == 0:
-            return vector
-        return [val / magnitude for val in vector]
+            return list(vector)
+        return (arr / magnitude).tolist()
     
     def resize_embedding(self, embedding: List[float]) -> List[float]:
-        """Resize embedding to target dimension."""
+        """Resize embedding to target dimension and normalize it to unit length."""
         if len(embedding) == self.target_dimension:
-            return embedding
+            return self.normalize_vector(embedding)
         
-        result = [0.0] * self.target_dimension
-        ratio = len(embedding) / self.target_dimension
+        arr = np.asarray(embedding, dtype=np.float64)
+        ratio = len(arr) / self.target_dimension
         
-        for i in range(self.target_dimension):
-            start = int(i * ratio)
-            end = int((i + 1) * ratio)
-            if end > len(embedding):
-                end = len(embedding)
-            
-            if start < end:
-                sum_val = sum(embedding[j] for j in range(start, end))
-                result[i] = sum_val / (end - start)
+        # Bucket i averages embedding[int(i * ratio):int((i + 1) * ratio)]
+        bounds = np.minimum((np.arange(self.target_dimension + 1) * ratio).astype(np.int64), len(arr))
+        starts, ends = bounds[:-1], bounds[1:]
+        prefix = np.concatenate(([0.0], np.cumsum(arr)))
+        counts = ends - starts
+        result = np.zeros(self.target_dimension, dtype=np.float64)
+        filled = counts > 0
+        result[filled] = (prefix[ends[filled]] - prefix[starts[filled]]) / counts[filled]
         
         return self.normalize_vector(result)
     
     def embed(self, text: str) -> List[float]:
-        """Generate embedding for text."""
+        """Generate embedding for text, falling back to a random vector if the API fails."""
+        return self.embed_with_status(text)[0]
+    
+    def embed_with_status(self, text: str) -> Tuple[List[float], bool]:
+        """Generate embedding for text; the flag is False when the random fallback was used."""
         try:
-            logger.info(f"Sending embedding request to endpoint: {self.embedding_endpoint}")
-            logger.info(f"Using model: {self.embedding_model}")
-            logger.info(f"Text length: {len(text)} characters")
-            
-            # Prepare request
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {self.api_key}'
-            }
+            # Per-request details are only formatted when DEBUG logging is enabled
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Sending embedding request to endpoint: {self.embedding_endpoint}")
+                logger.debug(f"Using model: {self.embedding_model}")
+                logger.debug(f"Text length: {len(text)} characters")
             
+            # Prepare request; headers and URL are set up once in __init__
             data = {
                 'model': self.embedding_model,
                 'input': text
             }
             
             # Make request
-            # Check if the endpoint already ends with /embeddings
-            endpoint = self.embedding_endpoint
-            if endpoint.endswith('/embeddings'):
-                request_url = endpoint
-            else:
-                request_url = f"{endpoint}/embeddings"
-                
-            response = requests.post(
-                request_url,
-                headers=headers,
+            response = self.session.post(
+                self.request_url,
                 json=data,
                 timeout=30
             )
@@ -100,9 +161,13 @@ class EmbeddingRetriever:
             if not response.ok:
                 logger.warning(f"HTTP error! Status: {response.status_code}")
                 logger.warning(f"Error response: {response.text}")
-                return self.generate_random_embedding()
+                return self.generate_random_embedding(), False
             
-            response_data = response.json()
+            try:
+                response_data = orjson.loads(response.content)
+            except orjson.JSONDecodeError as e:
+                logger.warning(f"Embedding API returned invalid JSON: {e}")
+                return self.generate_random_embedding(), False
             
             # Check if we got a valid embedding in the expected OpenAI format
             if (not response_data or 
@@ -111,7 +176,7 @@ class EmbeddingRetriever:
                 not response_data['data'][0].get('embedding')):
                 logger.warning("Warning: Embedding API didn't return a valid embedding")
                 logger.warning(f"Response: {response_data}")
-                return self.generate_random_embedding()
+                return self.generate_random_embedding(), False
             
             # Get the embedding array from the OpenAI-compatible format
             embedding = response_data['data'][0]['embedding']
@@ -119,46 +184,98 @@ class EmbeddingRetriever:
             # Ensure we have the target dimensional vector
             resized_embedding = self.resize_embedding(embedding)
             
-            logger.info(f"Successfully processed embedding with {len(resized_embedding)} dimensions")
-            return resized_embedding
+            logger.debug("Successfully processed embedding with %d dimensions", len(resized_embedding))
+            return resized_embedding, True
             
         except Exception as e:
             logger.error(f"Error fetching embedding from endpoint: {e}")
-            return self.generate_random_embedding()
+            return self.generate_random_embedding(), False
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a given text."""
         return self.embed(text)
     
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts with a single embedding request."""
+        return self.embed_batch_with_status(texts)[0]
+    
+    def embed_batch_with_status(self, texts: List[str]) -> Tuple[List[List[float]], List[bool]]:
+        """Batch variant of embed_with_status: embeddings plus a per-text success mask."""
+        if not texts:
+            return [], []
+        
+        try:
+            data = {
+                'model': self.embedding_model,
+                'input': texts
+            }
+            
+            response = self.session.post(
+                self.request_url,
+                json=data,
+                timeout=60
+            )
+            
+            if not response.ok:
+                logger.warning(f"HTTP error on batch embedding! Status: {response.status_code}")
+                return self._embed_one_by_one(texts)
+            
+            items = orjson.loads(response.content).get('data') or []
+            if len(items) != len(texts) or not all(item.get('embedding') for item in items):
+                logger.warning("Batch embedding response incomplete, embedding texts one by one")
+                return self._embed_one_by_one(texts)
+            
+            # Embeddings may come back in any order; 'index' refers to the input position
+            items = sorted(items, key=lambda item: item.get('index', 0))
+            return [self.resize_embedding(item['embedding']) for item in items], [True] * len(items)
+            
+        except Exception as e:
+            logger.error(f"Error fetching batch embeddings from endpoint: {e}")
+            return self._embed_one_by_one(texts)
+    
+    def _embed_one_by_one(self, texts: List[str]) -> Tuple[List[List[float]], List[bool]]:
+        """Fallback for a failed batch request, keeping each text's success flag."""
+        results = [self.embed_with_status(text) for text in texts]
+        return [embedding for embedding, _ in results], [embedded for _, embedded in results]
+    
+    def generate_embeddings_batch(self, texts: List[str], batch_size: int = 64) -> List[List[float]]:
         """Generate embeddings for a batch of texts."""
         embeddings = []
-        for text in texts:
-            embedding = self.embed(text)
-            embeddings.append(embedding)
+        for start in range(0, len(texts), batch_size):
+            embeddings.extend(self.embed_batch(texts[start:start + batch_size]))
         return embeddings
     
-    def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
-        """Add documents with embeddings to the vector store."""
+    def add_documents(self, documents: List[Dict[str, Any]], batch_size: int = 64) -> bool:
+        """
+        Add documents with embeddings to the vector store.
+        
+        Documents whose embedding fell back to a random vector are not indexed, and
+        False is returned so callers do not record them as embedded.
+        """
         try:
-            # Generate embeddings for documents
-            texts = [doc["content"] for doc in documents]
-            embeddings = self.generate_embeddings_batch(texts)
-            
-            # Prepare documents with embeddings
             embedded_docs = []
-            for i, doc in enumerate(documents):
-                embedded_doc = {
-                    "id": doc.get("id"),
-                    "content": doc["content"],
-                    "vector": embeddings[i],
-                    "metadata": doc.get("metadata", {}),
-                    "timestamp": doc.get("timestamp")
-                }
-                embedded_docs.append(embedded_doc)
+            for start in range(0, len(documents), batch_size):
+                batch = documents[start:start + batch_size]
+                embeddings, embedded = self.embed_batch_with_status([doc["content"] for doc in batch])
+                
+                # Prepare documents with real embeddings only
+                for doc, embedding, ok in zip(batch, embeddings, embedded):
+                    if ok:
+                        embedded_docs.append({
+                            "id": doc.get("id"),
+                            "content": doc["content"],
+                            "vector": embedding,
+                            "metadata": doc.get("metadata", {}),
+                            "timestamp": doc.get("timestamp")
+                        })
+            
+            skipped = len(documents) - len(embedded_docs)
+            if skipped:
+                logger.warning(f"Not indexing {skipped} documents: embedding API unavailable, got fallback vectors")
             
             # Add to vector store
-            return self.vector_store.add_documents(embedded_docs)
+            indexed = not embedded_docs or self.vector_store.add_documents(embedded_docs)
+            return indexed and not skipped
             
         except Exception as e:
             logger.error(f"Failed to add documents: {e}")
@@ -197,22 +314,13 @@ class EmbeddingRetriever:
             top_k: Number of top results to return
             
         Returns:
-            List of documents with content and metadata
+            List of documents with content, source and score
         """
         try:
             # Generate query embedding
             query_embedding = self.embed(query)
             
-            # Search using the vector store
-            results = self.vector_store.similarity_search(
-                query_vector=query_embedding,
-                k=top_k
-            )
-            
-            # Truncate content to reduce token usage
-            for result in results:
-                if len(result['content']) > 500:
-                    result['content'] = result['content'][:500]
+            results = self.search_by_vector(query_embedding, top_k=top_k)
             
             logger.info(f"Found {len(results)} similar documents for query: {query[:50]}...")
             return results
@@ -220,6 +328,166 @@ class EmbeddingRetriever:
         except Exception as e:
             logger.error(f"Failed to search documents: {e}")
             return []
+    
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.ASYNC_CONCURRENCY)
+        return self._async_semaphore
+    
+    async def asearch(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Async variant of search for callers running on an event loop.
+        
+        The blocking HTTP round-trips run on a worker thread, so the event loop keeps
+        serving other requests and several searches can be awaited together.
+        """
+        async with self._get_async_semaphore():
+            return await asyncio.to_thread(self.search, query, top_k)
+    
+    async def abatch_search(self, queries: List[str], top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """Async variant of batch_search."""
+        async with self._get_async_semaphore():
+            return await asyncio.to_thread(self.batch_search, queries, top_k)
+    
+    def batch_search(self, queries: List[str], top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries with one embedding request and one _msearch round-trip.
+        
+        Args:
+            queries: The search queries
+            top_k: Number of top results to return per query
+            
+        Returns:
+            One list of documents per query, in query order
+        """
+        try:
+            query_embeddings = self.embed_batch(queries)
+            return self.batch_search_by_vector(query_embeddings, top_k=top_k)
+        except Exception as e:
+            logger.error(f"Failed to batch search documents: {e}")
+            return [[] for _ in queries]
+    
+    def batch_search_by_vector(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 3,
+        min_score: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for several already computed query embeddings in a single _msearch request."""
+        all_results = self.vector_store.multi_similarity_search(query_embeddings, k=top_k, min_score=min_score)
+        
+        for results in all_results:
+            self._truncate_results(results)
+        
+        return all_results
+    
+    @staticmethod
+    def _truncate_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Truncate content to reduce token usage."""
+        for result in results:
+            if len(result['content']) > 500:
+                result['content'] = result['content'][:500]
+        return results
+    
+    def search_by_vector(
+        self,
+        query_embedding: List[float],
+        top_k: int = 3,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents using an already computed query embedding.
+        
+        Args:
+            query_embedding: The query embedding
+            top_k: Number of top results to return
+            min_score: Optional score below which OpenSearch drops hits
+            
+        Returns:
+            List of documents with content, source and score
+        """
+        # Search using the vector store
+        results = self.vector_store.similarity_search(
+            query_vector=query_embedding,
+            k=top_k,
+            min_score=min_score
+        )
+        
+        return self._truncate_results(results)
+    
+    def search_by_vector_mmr(
+        self,
+        query_embedding: List[float],
+        top_k: int = 3,
+        mmr_lambda: float = 0.7,
+        fetch_k: int = None,
+        min_score: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search with an already computed query embedding and re-rank by Maximal Marginal Relevance.
+        
+        Args:
+            query_embedding: The query embedding
+            top_k: Number of results to return
+            mmr_lambda: Trade-off between relevance (1.0) and diversity (0.0)
+            fetch_k: Candidates fetched from OpenSearch before re-ranking (default: 3 * top_k)
+            min_score: Optional score below which OpenSearch drops candidates
+            
+        Returns:
+            List of documents with content, source and score
+        """
+        candidates = self.vector_store.similarity_search(
+            query_vector=query_embedding,
+            k=fetch_k or 3 * top_k,
+            include_vectors=True,
+            min_score=min_score
+        )
+        return self._mmr_rerank(query_embedding, candidates, top_k, mmr_lambda)
+    
+    def batch_search_by_vector_mmr(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 3,
+        mmr_lambda: float = 0.7,
+        fetch_k: int = None,
+        min_score: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Batch variant of search_by_vector_mmr: one _msearch request, candidates re-ranked per query."""
+        all_candidates = self.vector_store.multi_similarity_search(
+            query_embeddings,
+            k=fetch_k or 3 * top_k,
+            include_vectors=True,
+            min_score=min_score
+        )
+        return [
+            self._mmr_rerank(query_embedding, candidates, top_k, mmr_lambda)
+            for query_embedding, candidates in zip(query_embeddings, all_candidates)
+        ]
+    
+    def _mmr_rerank(
+        self,
+        query_embedding: List[float],
+        candidates: List[Dict[str, Any]],
+        top_k: int,
+        mmr_lambda: float
+    ) -> List[Dict[str, Any]]:
+        """Pick top_k candidates by Maximal Marginal Relevance and strip their stored vectors."""
+        if len(candidates) > top_k and all("embedding" in result for result in candidates):
+            selected = mmr_select(
+                query_embedding,
+                [result["embedding"] for result in candidates],
+                top_k,
+                mmr_lambda
+            )
+            results = [candidates[i] for i in selected]
+        else:
+            results = candidates[:top_k]
+        
+        # Stored vectors are only needed for re-ranking
+        for result in results:
+            result.pop("embedding", None)
+        
+        return self._truncate_results(results)
 
     def add_document(self, content: str, metadata: Dict[str, Any] = None) -> bool:
         """
@@ -233,8 +501,11 @@ class EmbeddingRetriever:
             True if successful, False otherwise
         """
         try:
-            # Generate embedding for the document
-            embedding = self.embed(content)
+            # Generate embedding for the document; a fallback vector is never indexed
+            embedding, embedded = self.embed_with_status(content)
+            if not embedded:
+                logger.warning("Not indexing document: embedding API unavailable, got a fallback vector")
+                return False
             
             # Prepare document
             doc = {
@@ -262,10 +533,7 @@ class EmbeddingRetriever:
             # Format context
             context_parts = []
             for i, doc in enumerate(similar_docs, 1):
-                metadata = doc.get("metadata", {})
-                source = metadata.get("source", "Unknown")
-                
-                context_part = f"[Context {i} - Source: {source}]\n{doc['content']}\n"
+                context_part = f"[Context {i} - Source: {doc['source']}]\n{doc['content']}\n"
                 context_parts.append(context_part)
             
             context = "\n".join(context_parts)
@@ -285,7 +553,18 @@ class EmbeddingRetriever:
         """Get the number of documents in the vector store."""
         return self.vector_store.get_document_count()
     
+    def existing_document_ids(self, ids: List[str]) -> set:
+        """Return the subset of document ids already present in the vector store."""
+        return self.vector_store.existing_ids(ids)
+    
     def close(self) -> None:
-        """Close the vector store connection."""
+        """Close the HTTP session and the vector store connection."""
+        self.session.close()
         if self.vector_store:
             self.vector_store.close()
+    
+    def __enter__(self) -> "EmbeddingRetriever":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -3,13 +3,24 @@ import json
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from aws_requests_auth.aws_auth import AWSRequestsAuth
+from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
+from aws_requests_auth.boto_utils import BotoAWSRequestsAuth
 import boto3
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+def innerproduct_to_cosine_score(score: float) -> float:
+    """Map an OpenSearch innerproduct score for unit vectors onto the cosinesimil scale (0..1)."""
+    # OpenSearch scores innerproduct as 1 + dot for dot >= 0 and 1 / (1 - dot) otherwise
+    cosine = score - 1 if score >= 1 else 1 - 1 / score
+    return (1 + cosine) / 2
+
+def cosine_to_innerproduct_score(score: float) -> float:
+    """Inverse of innerproduct_to_cosine_score, for expressing thresholds in raw innerproduct units."""
+    cosine = 2 * score - 1
+    return 1 + cosine if cosine >= 0 else 1 / (1 - cosine)
+
 class OpenSearchVectorStore:
     """Vector store implementation using OpenSearch."""
     
@@ -17,6 +28,7 @@ class OpenSearchVectorStore:
         self.index_name = index_name or config.VECTOR_INDEX_NAME
         self.client: Optional[OpenSearch] = None
         self.dimension = 384  # Default dimension for embeddings
+        self._space_type: Optional[str] = None  # Read from the index mapping on first search
         self._initialize_client()
     
     def _initialize_client(self) -> None:
@@ -36,11 +48,9 @@ class OpenSearchVectorStore:
             else:
                 host = endpoint_url
             
-            # Create AWS auth
-            awsauth = AWSRequestsAuth(
-                aws_access_key=credentials.access_key,
-                aws_secret_access_key=credentials.secret_key,
-                aws_token=credentials.token,
+            # Create AWS auth that re-reads refreshable boto credentials per request,
+            # so long-lived clients keep working after rotated credentials expire
+            awsauth = BotoAWSRequestsAuth(
                 aws_host=host,
                 aws_region=config.AWS_REGION,
                 aws_service='es'
@@ -61,6 +71,18 @@ class OpenSearchVectorStore:
             logger.error(f"Failed to initialize OpenSearch client: {e}")
             raise
     
+    def _get_space_type(self) -> str:
+        """Return the k-NN space type of the embedding field, so scores from older cosinesimil indexes stay as-is."""
+        if self._space_type is None:
+            try:
+                mapping = self.client.indices.get_mapping(index=self.index_name)
+                properties = next(iter(mapping.values()))["mappings"]["properties"]
+                self._space_type = properties["embedding"].get("method", {}).get("space_type", "cosinesimil")
+            except Exception as e:
+                logger.warning(f"Could not read space type for index {self.index_name}: {e}")
+                return "cosinesimil"
+        return self._space_type
+    
     def create_index(self, dimension: int = 384) -> bool:
         """Create the vector index if it doesn't exist."""
         if not self.client:
@@ -78,8 +100,7 @@ class OpenSearchVectorStore:
             index_body = {
                 "settings": {
                     "index": {
-                        "knn": True,
-                        "knn.space_type": "cosinesimil"
+                        "knn": True
                     }
                 },
                 "mappings": {
@@ -89,11 +110,13 @@ class OpenSearchVectorStore:
                             "dimension": dimension,
                             "method": {
                                 "name": "hnsw",
-                                "space_type": "cosinesimil",
-                                "engine": "nmslib",
+                                # Embeddings are L2-normalized, so inner product ranks like cosine
+                                "space_type": "innerproduct",
+                                "engine": "faiss",
                                 "parameters": {
-                                    "ef_construction": 128,
-                                    "m": 16
+                                    "ef_construction": 256,
+                                    "m": 16,
+                                    "ef_search": 64
                                 }
                             }
                         },
@@ -129,8 +152,6 @@ class OpenSearchVectorStore:
             raise RuntimeError("OpenSearch client not initialized")
         
         try:
-            from datetime import datetime
-            
             doc_body = {
                 "embedding": embedding,
                 "document": document,
@@ -151,41 +172,69 @@ class OpenSearchVectorStore:
             logger.error(f"Failed to add embedding: {e}")
             return False
     
+    def _bulk_actions(self, documents: List[Dict[str, Any]]):
+        """Yield bulk index actions for documents with embeddings."""
+        for doc in documents:
+            action = {
+                "_index": self.index_name,
+                "_source": {
+                    "embedding": doc["vector"],
+                    "document": doc["content"],
+                    "metadata": doc.get("metadata", {}),
+                    "timestamp": doc.get("timestamp") or datetime.now().isoformat()
+                }
+            }
+            if doc.get("id") is not None:
+                action["_id"] = doc["id"]
+            yield action
+    
+    def bulk_index(
+        self,
+        actions,
+        chunk_size: int = 500,
+        max_chunk_bytes: int = 10 * 1024 * 1024
+    ) -> Tuple[int, int]:
+        """Stream bulk index actions to OpenSearch in chunks.
+        
+        Returns:
+            Tuple of (indexed, failed) document counts
+        """
+        if not self.client:
+            raise RuntimeError("OpenSearch client not initialized")
+        
+        indexed = 0
+        failed = 0
+        for ok, info in helpers.streaming_bulk(
+            self.client,
+            actions,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            raise_on_error=False
+        ):
+            if ok:
+                indexed += 1
+            else:
+                failed += 1
+                logger.error(f"Bulk indexing error: {info}")
+        
+        return indexed, failed
+    
     def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """Add multiple documents with embeddings to the vector store."""
         if not self.client:
             raise RuntimeError("OpenSearch client not initialized")
         
         try:
-            # Prepare bulk operations
-            bulk_body = []
-            
-            for doc in documents:
-                # Index operation
-                bulk_body.append({
-                    "index": {
-                        "_index": self.index_name,
-                        "_id": doc.get("id", None)
-                    }
-                })
-                
-                # Document data
-                bulk_body.append({
-                    "embedding": doc["vector"],
-                    "document": doc["content"],
-                    "metadata": doc.get("metadata", {}),
-                    "timestamp": doc.get("timestamp", datetime.now().isoformat())
-                })
+            indexed, failed = self.bulk_index(self._bulk_actions(documents))
             
-            # Execute bulk operation
-            response = self.client.bulk(body=bulk_body, refresh=True)
+            # Refresh once after all chunks instead of per request
+            self.client.indices.refresh(index=self.index_name)
             
-            # Check for errors
-            if response.get("errors"):
-                logger.error(f"Bulk indexing errors: {response}")
+            if failed:
+                logger.error(f"Bulk indexing finished with {failed} errors")
                 return False
             
-            logger.info(f"Successfully indexed {len(documents)} documents")
+            logger.info(f"Successfully indexed {indexed} documents")
             return True
             
         except Exception as e:
@@ -231,9 +280,15 @@ class OpenSearchVectorStore:
         self, 
         query_vector: List[float], 
         k: int = None, 
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        include_vectors: bool = False,
+        min_score: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Perform similarity search using vector with detailed results."""
+        """Perform similarity search using vector with detailed results.
+        
+        With include_vectors set, each result also carries its stored "embedding" for re-ranking.
+        min_score (on the same scale as the returned scores) drops weaker hits inside OpenSearch.
+        """
         if not self.client:
             raise RuntimeError("OpenSearch client not initialized")
         
@@ -253,6 +308,12 @@ class OpenSearchVectorStore:
                 },
                 "_source": ["document", "metadata"]  # Only return necessary fields
             }
+            if include_vectors:
+                query["_source"].append("embedding")
+            if min_score is not None:
+                if self._get_space_type() == "innerproduct":
+                    min_score = cosine_to_innerproduct_score(min_score)
+                query["min_score"] = min_score
             
             # Add filters if provided
             if filter_dict:
@@ -271,25 +332,7 @@ class OpenSearchVectorStore:
                 body=query
             )
             
-            # Process results - keep metadata minimal
-            results = []
-            for hit in response["hits"]["hits"]:
-                # Extract only essential metadata to reduce token usage
-                metadata = {}
-                if "metadata" in hit["_source"]:
-                    source_metadata = hit["_source"]["metadata"]
-                    # Only keep essential metadata fields
-                    if isinstance(source_metadata, dict):
-                        metadata = {
-                            "source": source_metadata.get("source", "Unknown")
-                        }
-                
-                results.append({
-                    "content": hit["_source"]["document"],
-                    "metadata": metadata,
-                    "score": hit["_score"],
-                    "id": hit["_id"]
-                })
+            results = self._process_hits(response["hits"]["hits"])
             
             logger.info(f"Found {len(results)} similar documents")
             return results
@@ -298,6 +341,86 @@ class OpenSearchVectorStore:
             logger.error(f"Failed to perform similarity search: {e}")
             return []
     
+    def multi_similarity_search(
+        self,
+        query_vectors: List[List[float]],
+        k: int = None,
+        include_vectors: bool = False,
+        min_score: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Run several k-NN searches in a single _msearch request, one result list per query vector.
+        
+        include_vectors and min_score apply to every search exactly as in similarity_search.
+        """
+        if not self.client:
+            raise RuntimeError("OpenSearch client not initialized")
+        
+        if not query_vectors:
+            return []
+        
+        k = k or config.TOP_K_RESULTS
+        if min_score is not None and self._get_space_type() == "innerproduct":
+            min_score = cosine_to_innerproduct_score(min_score)
+        
+        try:
+            # _msearch body alternates a header line and a search body per query
+            body = []
+            for query_vector in query_vectors:
+                search_body = {
+                    "size": k,
+                    "query": {
+                        "knn": {
+                            "embedding": {
+                                "vector": query_vector,
+                                "k": k
+                            }
+                        }
+                    },
+                    "_source": ["document", "metadata"]
+                }
+                if include_vectors:
+                    search_body["_source"].append("embedding")
+                if min_score is not None:
+                    search_body["min_score"] = min_score
+                body.append({"index": self.index_name})
+                body.append(search_body)
+            
+            response = self.client.msearch(body=body)
+            
+            all_results = []
+            for item in response["responses"]:
+                if "error" in item:
+                    logger.error(f"Failed to perform similarity search in msearch: {item['error']}")
+                    all_results.append([])
+                else:
+                    all_results.append(self._process_hits(item["hits"]["hits"]))
+            
+            logger.info(f"Ran {len(query_vectors)} similarity searches in one request")
+            return all_results
+            
+        except Exception as e:
+            logger.error(f"Failed to perform multi similarity search: {e}")
+            return [[] for _ in query_vectors]
+    
+    def _process_hits(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Normalise search hits to a flat {content, source, score, id} schema, so callers need no fallbacks."""
+        convert_score = self._get_space_type() == "innerproduct"
+        results = []
+        for hit in hits:
+            hit_source = hit["_source"]
+            # Only the source is kept from the metadata to reduce token usage
+            source_metadata = hit_source.get("metadata")
+            
+            results.append({
+                "content": hit_source["document"],
+                "source": source_metadata.get("source", "Unknown") if isinstance(source_metadata, dict) else "Unknown",
+                "score": float(innerproduct_to_cosine_score(hit["_score"]) if convert_score else hit["_score"]),
+                "id": hit["_id"]
+            })
+            if "embedding" in hit_source:
+                results[-1]["embedding"] = hit_source["embedding"]
+        return results
+    
     def delete_index(self) -> bool:
         """Delete the vector index."""
         if not self.client:
@@ -316,6 +439,21 @@ class OpenSearchVectorStore:
             logger.error(f"Failed to delete index: {e}")
             return False
     
+    def existing_ids(self, ids: List[str]) -> set:
+        """Return the subset of document ids already present in the index."""
+        if not self.client:
+            raise RuntimeError("OpenSearch client not initialized")
+        
+        if not ids:
+            return set()
+        
+        try:
+            response = self.client.mget(index=self.index_name, body={"ids": ids}, _source=False)
+            return {doc["_id"] for doc in response["docs"] if doc.get("found")}
+        except Exception as e:
+            logger.warning(f"Failed to look up existing document ids: {e}")
+            return set()
+    
     def get_document_count(self) -> int:
         """Get the number of documents in the index."""
         if not self.client:
@@ -0,0 +1,151 @@
+"""Process-local semantic cache for knowledge base search results."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import numpy as np
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    """Caches search results keyed by query embedding, hit when cosine similarity >= threshold.
+
+    A max_entries of 0 or less disables the cache: lookups miss and put stores nothing.
+    """
+
+    def __init__(self, threshold: float = 0.85, ttl: float = 300, max_entries: int = 256):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(0, max_entries)
+        # Preallocated slot arrays: unit query vectors, cached top_k and expiry (0 marks a free slot)
+        self._matrix: Optional[np.ndarray] = None
+        self._top_k = np.zeros(max_entries, dtype=np.int32)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._results: Dict[int, List[Dict[str, Any]]] = {}
+        # Exact query text -> slot, so repeated queries skip the embedding call entirely
+        self._text_slots: Dict[str, int] = {}
+        self._slot_texts: Dict[int, str] = {}
+        # Occupied slots, least recently used first
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._free: List[int] = []
+        self._used = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _forget_text(self, slot: int) -> None:
+        text = self._slot_texts.pop(slot, None)
+        if text is not None and self._text_slots.get(text) == slot:
+            del self._text_slots[text]
+
+    def _release(self, slot: int) -> None:
+        self._expires[slot] = 0
+        self._results.pop(slot, None)
+        self._lru.pop(slot, None)
+        self._forget_text(slot)
+        self._free.append(slot)
+
+    def _allocate(self, now: float) -> int:
+        expired = np.flatnonzero((self._expires[:self._used] > 0) & (self._expires[:self._used] <= now))
+        for slot in expired:
+            self._release(int(slot))
+        if self._free:
+            return self._free.pop()
+        if self._used < self.max_entries:
+            self._used += 1
+            return self._used - 1
+        slot, _ = self._lru.popitem(last=False)
+        self._forget_text(slot)
+        return slot
+
+    def get_by_text(self, query: str, top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for exactly the same query text, or None on a miss."""
+        if not self.max_entries:
+            return None
+        with self._lock:
+            slot = self._text_slots.get(query)
+            if slot is None or self._expires[slot] <= time.monotonic() or self._top_k[slot] < top_k:
+                return None
+            self._lru.move_to_end(slot)
+            return self._results[slot][:top_k]
+
+    def get(self, embedding: List[float], top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for a semantically similar query, or None on a miss."""
+        if not self.max_entries:
+            return None
+        query = self._unit(embedding)
+        with self._lock:
+            if not self._used or self._matrix.shape[1] != query.shape[0]:
+                return None
+
+            # Entries that expired or cached fewer results than requested cannot answer this query
+            live = (self._expires[:self._used] > time.monotonic()) & (self._top_k[:self._used] >= top_k)
+            if not live.any():
+                return None
+
+            similarities = self._matrix[:self._used] @ query
+            similarities[~live] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            self._lru.move_to_end(best)
+            logger.debug(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+            return self._results[best][:top_k]
+
+    def put(
+        self,
+        embedding: List[float],
+        top_k: int,
+        results: List[Dict[str, Any]],
+        query: Optional[str] = None
+    ) -> None:
+        """Cache results for a query embedding, evicting the least recently used entry when full.
+
+        When the query text is given, later identical queries can also hit via get_by_text.
+        """
+        if not self.max_entries:
+            return
+        vector = self._unit(embedding)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # First entry, or the embedding model changed dimension
+                self.clear()
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            now = time.monotonic()
+            slot = self._allocate(now)
+            self._matrix[slot] = vector
+            self._top_k[slot] = top_k
+            self._expires[slot] = now + self.ttl
+            self._results[slot] = results
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+            if query is not None:
+                self._slot_texts[slot] = query
+                self._text_slots[query] = slot
+
+    def clear(self) -> None:
+        """Drop all cached results, e.g. after the knowledge base is re-embedded."""
+        with self._lock:
+            self._expires[:] = 0
+            self._results.clear()
+            self._lru.clear()
+            self._text_slots.clear()
+            self._slot_texts.clear()
+            self._free.clear()
+            self._used = 0
+
+# Global cache instance shared by the search tools
+semantic_cache = SemanticCache(
+    threshold=config.SEMANTIC_CACHE_TAU,
+    ttl=config.SEMANTIC_CACHE_TTL,
+    max_entries=config.SEMANTIC_CACHE_MAX
+)
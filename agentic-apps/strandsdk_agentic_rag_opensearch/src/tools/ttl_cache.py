@@ -0,0 +1,47 @@
+"""Small process-local TTL caches shared by the agents."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from ..config import config
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire ttl_sec seconds after being set."""
+    
+    def __init__(self, max_items: int = 128, ttl_sec: float = 60):
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            ts, value = entry
+            if time.monotonic() - ts > self.ttl_sec:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Any, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._data.clear()
+
+# The document count changes only when the knowledge base is re-embedded, but the
+# prompts make the agent check it on every query, so the finished status JSON is cached;
+# the knowledge agent clears it after embedding new documents
+knowledge_status_cache = TTLCache(max_items=4, ttl_sec=config.KB_STATUS_TTL)
@@ -7,11 +7,20 @@ import warnings
 import sys
 import logging
 import os
+import atexit
 from contextlib import redirect_stderr
 from io import StringIO
 
+# Guards so repeated imports and runner setups do not redo the work
+_cleanup_configured = False
+_atexit_registered = False
+
 def setup_global_async_cleanup():
     """Set up global async cleanup and warning suppression."""
+    global _cleanup_configured
+    if _cleanup_configured:
+        return
+    _cleanup_configured = True
     
     # Suppress all async-related warnings globally
     warnings.filterwarnings("ignore", category=RuntimeWarning)
@@ -97,7 +106,7 @@ class AsyncWarningFilter:
 
 def install_global_stderr_filter():
     """Install global stderr filter to suppress async warnings."""
-    if not hasattr(sys.stderr, '_original_stderr'):
+    if not isinstance(sys.stderr, AsyncWarningFilter) and not hasattr(sys.stderr, '_original_stderr'):
         sys.stderr._original_stderr = sys.stderr
         sys.stderr = AsyncWarningFilter(sys.stderr._original_stderr)
 
@@ -107,10 +116,16 @@ def remove_global_stderr_filter():
         original = sys.stderr._original_stderr
         sys.stderr = original
 
-# Apply global setup when module is imported
-setup_global_async_cleanup()
-install_global_stderr_filter()
+def ensure_clean_runtime():
+    """Idempotently apply the global setup, install the stderr filter and register its removal on exit."""
+    global _atexit_registered
+    setup_global_async_cleanup()
+    install_global_stderr_filter()
+    
+    # Ensure cleanup on exit
+    if not _atexit_registered:
+        atexit.register(remove_global_stderr_filter)
+        _atexit_registered = True
 
-# Ensure cleanup on exit
-import atexit
-atexit.register(remove_global_stderr_filter)
+# Apply global setup when module is imported
+ensure_clean_runtime()
@@ -1,5 +1,7 @@
 """Langfuse configuration and utilities."""
 
+import atexit
+import random
 from typing import Optional, Dict, Any
 from ..config import config
 
@@ -48,14 +50,21 @@ class LangfuseConfig:
                 public_key=config.LANGFUSE_PUBLIC_KEY,
                 secret_key=config.LANGFUSE_SECRET_KEY
             )
+            # The client exports in the background; flush once at shutdown instead of per request
+            atexit.register(self.flush)
             print("Langfuse initialized successfully")
         except Exception as e:
             print(f"Failed to initialize Langfuse: {e}")
             self.client = None
     
+    @staticmethod
+    def _sampled() -> bool:
+        """Head-based sampling decision, made once per trace; spans follow their trace."""
+        return config.TRACE_SAMPLE_RATE >= 1 or random.random() < config.TRACE_SAMPLE_RATE
+    
     def create_trace(self, name: str, input_data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
-        """Create a new trace."""
-        if not self.client:
+        """Create a new trace, or return None when tracing is off or the trace is sampled out."""
+        if not self.client or not self._sampled():
             return None
         
         try:
@@ -73,13 +82,16 @@ class LangfuseConfig:
             return None
     
     def create_span(self, trace, name: str, input_data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
-        """Create a new span within a trace."""
-        if not self.client:
+        """Create a new span within a trace, or return None when tracing is off or the trace was sampled out."""
+        # A missing trace means it was sampled out (or never created), so the span is dropped with it
+        if not self.client or trace is None:
             return None
         
         try:
-            # For Langfuse 3.x
-            span = self.client.start_span(
+            # For Langfuse 3.x, nest the span under the trace's root span when possible
+            parent = getattr(trace, "span", None)
+            start_span = parent.start_span if hasattr(parent, "start_span") else self.client.start_span
+            span = start_span(
                 name=name,
                 input=input_data,
                 metadata=metadata or {}
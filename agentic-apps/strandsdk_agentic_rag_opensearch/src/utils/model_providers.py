@@ -1,5 +1,6 @@
 """Model provider configurations for Strands agents."""
 
+import functools
 from strands.models.openai import OpenAIModel
 from ..config import config
 
@@ -17,8 +18,13 @@ def create_openai_reasoning_model():
         }
     )
 
+@functools.lru_cache(maxsize=1)
 def get_reasoning_model():
-    """Get the configured reasoning model for agents."""
+    """Get the configured reasoning model for agents.
+    
+    The model only holds configuration and opens its API client per request, so one
+    instance is shared by every agent instead of being rebuilt for each fresh agent.
+    """
     try:
         # Try to use OpenAI client
         return create_openai_reasoning_model()
@@ -106,9 +106,13 @@ class StrandsTracingIntegration:
         if not os.getenv("STRANDS_OTEL_ENABLE_CONSOLE_EXPORT"):
             os.environ["STRANDS_OTEL_ENABLE_CONSOLE_EXPORT"] = "true"
         
-        # Set sampling if not configured (sample 100% for development)
+        # Set sampling if not configured (100% unless TRACE_SAMPLE_RATE lowers it)
         if not os.getenv("OTEL_TRACES_SAMPLER"):
-            os.environ["OTEL_TRACES_SAMPLER"] = "always_on"
+            if config.TRACE_SAMPLE_RATE < 1:
+                os.environ["OTEL_TRACES_SAMPLER"] = "parentbased_traceidratio"
+                os.environ["OTEL_TRACES_SAMPLER_ARG"] = str(config.TRACE_SAMPLE_RATE)
+            else:
+                os.environ["OTEL_TRACES_SAMPLER"] = "always_on"
         
         logger.info("Tracing environment configured")
 